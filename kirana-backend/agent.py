@@ -1,16 +1,46 @@
 from inventory_toolkit import InventoryToolkit
-from command_parser_agent import CommandParserAgent
-from typing import Dict, Any, Union, List
+from rule_parser import RuleBasedParser
+from parse_cache import normalize_command, parse_cache, parse_flights
+from async_parser import async_command_parser
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Union, List
 
 class ExecutionAgent:
     """Handles inventory management commands after they are parsed."""
 
-    def __init__(self):
-        """Initialize the command parser and inventory toolkit."""
+    def __init__(self, rule_parser: Optional[RuleBasedParser] = None):
+        """
+        Initialize the command parsers and inventory toolkit.
+
+        Args:
+            rule_parser (Optional[RuleBasedParser]): Parser to share with other
+                agents, so its stats cover all of them; a new one by default.
+        """
         self.inventory_toolkit = InventoryToolkit()
         self.pending_confirmation = None  # Stores the last operation for confirmation
         self.pending_confirmations = []   # Queue for batch confirmations
-        self.command_parser = CommandParserAgent()  # Initialize the command parser agent
+        self.reported_pending = 0         # Pending count last reported to the dashboard
+        self.rule_parser = rule_parser or RuleBasedParser()  # Parses common commands without the LLM
+        self._command_parser = None  # Synchronous LLM parser, created on first use
+
+    @property
+    def command_parser(self):
+        """
+        The CommandParserAgent behind process_command.
+
+        It is imported on first use, so the async path (and the API server
+        that relies on it) works without the synchronous parser installed.
+        """
+        if self._command_parser is None:
+            from command_parser_agent import CommandParserAgent
+            self._command_parser = CommandParserAgent()
+        return self._command_parser
+
+    def clear_pending(self) -> None:
+        """Drops every command waiting for confirmation."""
+        self.pending_confirmation = None
+        self.pending_confirmations = []
+        self._report_pending()
 
     def process_command(self, command: str) -> Dict[str, Any]:
         """
@@ -22,6 +52,58 @@ class ExecutionAgent:
         Returns:
             Dict[str, Any]: The response message and operation details.
         """
+        try:
+            return self._process_command(command)
+        finally:
+            self._report_pending()
+
+    def _report_pending(self) -> None:
+        """Keeps the dashboard's count of pending confirmations in step with this agent."""
+        pending = len(self.pending_confirmations) + (self.pending_confirmation is not None)
+        if pending != self.reported_pending:
+            self.inventory_toolkit.track_pending_confirmations(pending - self.reported_pending)
+            self.reported_pending = pending
+
+    async def process_command_async(self, command: str) -> Dict[str, Any]:
+        """
+        Processes and executes an inventory command without blocking the event loop.
+
+        Commands the rules cannot parse go to the shared AsyncCommandParser,
+        so a slow LLM call holds no thread while it waits. Cancelling this
+        call cancels the LLM request unless another caller shares it.
+
+        Args:
+            command (str): The user's natural language command.
+
+        Returns:
+            Dict[str, Any]: The response message and operation details.
+        """
+        try:
+            response = self._handle_confirmation(command)
+            if response is not None:
+                return response
+            parsed_data = self.rule_parser.parse(command)
+            if parsed_data is None:
+                parsed_data = await self._parse_with_llm_async(command)
+            return self._handle_parsed(parsed_data)
+        finally:
+            self._report_pending()
+
+    def _process_command(self, command: str) -> Dict[str, Any]:
+        """Handles one command; see process_command."""
+        response = self._handle_confirmation(command)
+        if response is not None:
+            return response
+
+        # Parse the command with the rules, falling back to the CommandParserAgent
+        # for anything the grammar does not cover
+        parsed_data = self.rule_parser.parse(command)
+        if parsed_data is None:
+            parsed_data = self._parse_with_llm(command)
+        return self._handle_parsed(parsed_data)
+
+    def _handle_confirmation(self, command: str) -> Optional[Dict[str, Any]]:
+        """Answers a "yes"/"no" reply to a pending confirmation; None for any other command."""
         # Handle confirmation responses for batch
         if command.lower() in ["yes", "no"] and self.pending_confirmations:
             if self.pending_confirmations:
@@ -60,17 +142,17 @@ class ExecutionAgent:
                 "success": False,
                 "response": "No pending command to confirm."
             }
+        return None
 
-        # Parse the command using the CommandParserAgent
-        parsed_data = self.command_parser.parse_command(command)
-
+    def _handle_parsed(self, parsed_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Runs list commands and queues the rest for confirmation."""
         # If multiple commands are parsed, queue confirmations for each actionable command
         if isinstance(parsed_data, list):
             actionable_cmds = [cmd for cmd in parsed_data if cmd["operation"] in ["add", "update", "delete"]]
             non_actionable_results = []
             for cmd in parsed_data:
                 if cmd["operation"] == "list":
-                    result = self.inventory_toolkit.list_inventory()
+                    result = self.inventory_toolkit.list_inventory(low_stock_only=cmd.get("low_stock", False))
                     non_actionable_results.append(result["response"])
             if actionable_cmds:
                 self.pending_confirmations = actionable_cmds
@@ -103,9 +185,10 @@ class ExecutionAgent:
                 "response": "Invalid command."
             }
 
-        # If operation is "list", execute immediately
+        # If operation is "list", execute immediately ("low_stock" lists only
+        # items below their threshold, most depleted first)
         if parsed_data["operation"] == "list":
-            return self.inventory_toolkit.list_inventory()
+            return self.inventory_toolkit.list_inventory(low_stock_only=parsed_data.get("low_stock", False))
 
         # Otherwise, confirm before execution
         self.pending_confirmation = parsed_data
@@ -114,6 +197,58 @@ class ExecutionAgent:
             "response": f"Confirm: {parsed_data['operation']} {parsed_data.get('quantity', '')} {parsed_data.get('unit type', '')} of {parsed_data['item']}? (yes/no)"
         }
 
+    def _parse_with_llm(self, command: str) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Parses a command with the CommandParserAgent, reusing earlier parses.
+
+        Commands are cached by their normalized text, so a repeated phrasing
+        never costs a second LLM call. Failed parses are not cached. Callers
+        sending the same command at the same time share one LLM call.
+
+        Args:
+            command (str): The user's command.
+
+        Returns:
+            Union[Dict[str, Any], List[Dict[str, Any]]]: The parsed command(s).
+        """
+        key = normalize_command(command)
+        parsed_data = parse_cache.get(key)
+        if parsed_data is None:
+            parsed_data = parse_flights.do(key, lambda: self._parse_uncached(command, key))
+        return parsed_data
+
+    def _parse_uncached(self, command: str, key: str) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Calls the CommandParserAgent and caches a successful parse under key."""
+        parsed_data = self.command_parser.parse_command(command)
+        self._cache_parse(key, parsed_data)
+        return parsed_data
+
+    async def _parse_with_llm_async(self, command: str) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Async counterpart of _parse_with_llm, using the shared AsyncCommandParser."""
+        key = normalize_command(command)
+        parsed_data = await parse_cache.get_async(key)
+        if parsed_data is None:
+            parsed_data = await parse_flights.do_async(key, lambda: self._parse_uncached_async(command, key))
+        return parsed_data
+
+    async def _parse_uncached_async(self, command: str, key: str) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Calls the AsyncCommandParser and caches a successful parse under key."""
+        parsed_data = await async_command_parser.parse_command(command)
+        if self._cacheable(parsed_data):
+            await parse_cache.put_async(key, parsed_data)
+        return parsed_data
+
+    def _cache_parse(self, key: str, parsed_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> None:
+        """Caches a parse unless the LLM did not understand (part of) the command."""
+        if self._cacheable(parsed_data):
+            parse_cache.put(key, parsed_data)
+
+    @staticmethod
+    def _cacheable(parsed_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> bool:
+        """Checks that the LLM understood every part of a command."""
+        commands = parsed_data if isinstance(parsed_data, list) else [parsed_data]
+        return bool(commands) and all(cmd.get("operation", "unknown") != "unknown" for cmd in commands)
+
     def execute_operation(self, operation_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Executes the confirmed inventory operation.
@@ -147,6 +282,51 @@ class ExecutionAgent:
             "response": "Invalid operation."
         }
 
+class AgentSessions:
+    """
+    One ExecutionAgent per chat session, so a "yes" or "no" only answers the
+    confirmation its own session is waiting on.
+
+    Agents are created on a session's first command and share one
+    RuleBasedParser. Once more than max_sessions are open, the least
+    recently used session is dropped along with its pending confirmations.
+    """
+
+    def __init__(self, max_sessions: int = 1000):
+        """
+        Initialize an empty set of sessions.
+
+        Args:
+            max_sessions (int): Sessions kept before the least recently used
+                one is dropped.
+        """
+        self.max_sessions = max_sessions
+        self.rule_parser = RuleBasedParser()
+        self._agents: "OrderedDict[str, ExecutionAgent]" = OrderedDict()
+
+    def get(self, session_id: str) -> ExecutionAgent:
+        """
+        Returns the agent of a session, creating it if the session is new.
+
+        Args:
+            session_id (str): Identifies the chat session.
+
+        Returns:
+            ExecutionAgent: The session's agent.
+        """
+        agent = self._agents.get(session_id)
+        if agent is None:
+            agent = self._agents[session_id] = ExecutionAgent(self.rule_parser)
+            while len(self._agents) > self.max_sessions:
+                _, oldest = self._agents.popitem(last=False)
+                oldest.clear_pending()
+        else:
+            self._agents.move_to_end(session_id)
+        return agent
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
 # If running directly, provide interactive CLI
 if __name__ == "__main__":
     execution_agent = ExecutionAgent()
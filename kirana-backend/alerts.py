@@ -0,0 +1,165 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# A consumer receives each batch of alerts as a list of dicts with "sku",
+# "name", "state" ("low" or "recovered"), "quantity", "threshold" and "at".
+AlertConsumer = Callable[[List[Dict[str, Any]]], None]
+
+
+class AlertDispatcher:
+    """
+    Delivers low-stock alerts to consumers in batches, off the write path.
+
+    emit() only files the alert under a lock; a background thread hands
+    batches to the consumers. Pending alerts are keyed by SKU id, so an item
+    that flaps within one batch window yields a single alert with its latest
+    state, and an alert repeating the state last delivered is dropped.
+    """
+
+    def __init__(self, batch_size: int = 100, batch_interval: float = 0.5):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            batch_size (int): Pending alerts that trigger an early delivery.
+            batch_interval (float): Seconds between deliveries otherwise.
+        """
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._consumers: List[AlertConsumer] = []
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._delivered: Dict[int, str] = {}  # SKU id -> last delivered state
+        self._lock = threading.Lock()
+        # Serializes deliveries so batches reach consumers in order
+        self._deliver_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, consumer: AlertConsumer) -> None:
+        """
+        Registers a consumer and starts delivering.
+
+        Args:
+            consumer (AlertConsumer): Called with every batch, on the
+                dispatcher thread. Exceptions are logged and ignored.
+        """
+        self._consumers.append(consumer)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+
+    def emit(self, alert: Dict[str, Any]) -> None:
+        """
+        Queues an alert. Safe to call from any thread; never blocks on consumers.
+
+        Args:
+            alert (Dict[str, Any]): The alert; "sku" and "state" are required.
+        """
+        if not self._consumers:
+            return
+        with self._lock:
+            self._pending.pop(alert["sku"], None)  # Re-insert so order follows the latest alert
+            self._pending[alert["sku"]] = alert
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def forget(self, sku: int) -> None:
+        """
+        Drops everything known about an item, e.g. because it was deleted.
+
+        Its pending alert is discarded, and if it is added again its first
+        alert is delivered even when it repeats the last one sent.
+
+        Args:
+            sku (int): The SKU id of the item.
+        """
+        with self._lock:
+            self._pending.pop(sku, None)
+            self._delivered.pop(sku, None)
+
+    def flush(self) -> None:
+        """Delivers every pending alert now."""
+        with self._deliver_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                batch = [alert for alert in pending.values() if self._delivered.get(alert["sku"]) != alert["state"]]
+                for alert in batch:
+                    self._delivered[alert["sku"]] = alert["state"]
+            if not batch:
+                return
+            for consumer in self._consumers:
+                try:
+                    consumer(batch)
+                except Exception:
+                    logger.exception("Alert consumer %r failed", consumer)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.batch_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stops the dispatcher thread after delivering what is pending."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+class QueueConsumer:
+    """Hands alerts to in-process workers through a bounded queue."""
+
+    def __init__(self, maxsize: int = 1000):
+        """
+        Initialize the consumer.
+
+        Args:
+            maxsize (int): Alerts held before new ones are dropped.
+        """
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize)
+
+    def __call__(self, alerts: List[Dict[str, Any]]) -> None:
+        for alert in alerts:
+            try:
+                self.queue.put_nowait(alert)
+            except queue.Full:
+                logger.warning("Alert queue full; dropping alert for SKU %s", alert["sku"])
+
+
+class WebhookConsumer:
+    """POSTs each batch as {"alerts": [...]} to a webhook URL."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        """
+        Initialize the consumer.
+
+        Args:
+            url (str): The webhook endpoint.
+            timeout (float): Seconds to wait for the webhook to answer.
+        """
+        self.url = url
+        self._client = httpx.Client(timeout=timeout)
+
+    def __call__(self, alerts: List[Dict[str, Any]]) -> None:
+        self._client.post(self.url, json={"alerts": alerts}).raise_for_status()
+
+
+alert_dispatcher = AlertDispatcher(
+    batch_size=int(os.getenv("KIRANA_ALERT_BATCH_SIZE", "100")),
+    batch_interval=float(os.getenv("KIRANA_ALERT_BATCH_INTERVAL", "0.5")),
+)
+if os.getenv("KIRANA_ALERT_WEBHOOK_URL"):
+    alert_dispatcher.subscribe(WebhookConsumer(os.environ["KIRANA_ALERT_WEBHOOK_URL"]))
+atexit.register(alert_dispatcher.close)
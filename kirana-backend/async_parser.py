@@ -0,0 +1,327 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ParsedCommand = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+# How one command's parse is written, shared by both prompts
+COMMAND_FORMAT = (
+    'one object per command, in the order given. Each object has "operation" '
+    '("add", "update", "delete", "list" or "unknown"), "item" (the item name), '
+    '"quantity" (a number) and "unit type" (e.g. "kg", "litre", "pc"); leave '
+    'out fields that do not apply. Use "unknown" for anything that is not an '
+    "inventory command."
+)
+
+SYSTEM_PROMPT = (
+    "You turn a shopkeeper's inventory commands into JSON. Reply with "
+    '{"commands": [...]} holding ' + COMMAND_FORMAT
+)
+
+BATCH_SYSTEM_PROMPT = (
+    "You turn shopkeepers' inventory commands into JSON. You receive a JSON "
+    'array of messages, each {"id": number, "text": string}, that were sent '
+    'independently. Reply with {"results": [{"id": number, "commands": [...]}]} '
+    'holding one result per message, where "commands" holds ' + COMMAND_FORMAT
+)
+
+UNKNOWN: Dict[str, Any] = {"operation": "unknown"}
+
+# Operations that act on an item, and those of them that need a quantity
+ITEM_OPERATIONS = ("add", "update", "delete")
+QUANTITY_OPERATIONS = ("add", "update")
+
+
+class AsyncCommandParser:
+    """
+    Parses commands with an OpenAI-compatible chat completions API (Groq by default).
+
+    All requests share one pooled httpx.AsyncClient, so connections are
+    reused, and a semaphore caps the calls in flight. Cancelling a
+    parse_command() call (e.g. because the HTTP client went away) aborts its
+    upstream request.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        max_concurrency: int = 256,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the parser.
+
+        Args:
+            base_url (str): The API root, e.g. "https://api.groq.com/openai/v1".
+            api_key (str): Sent as a bearer token, if not empty.
+            model (str): The chat model to use.
+            max_concurrency (int): Upstream calls allowed in flight at once;
+                also the size of the connection pool.
+            timeout (float): Seconds to wait for the API to connect or answer.
+            transport (Optional[httpx.AsyncBaseTransport]): Sends the requests
+                instead of the network, e.g. an httpx.MockTransport stub in tests.
+        """
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.requests = 0  # Upstream calls made
+        self.failures = 0  # Calls that errored, timed out or returned unusable JSON
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport,
+        )
+
+    async def parse_command(self, command: str) -> ParsedCommand:
+        """
+        Parses a command.
+
+        Args:
+            command (str): The user's natural language command.
+
+        Returns:
+            ParsedCommand: A command dict with "operation", "item", "quantity"
+                and "unit type", a list of them for several commands, or
+                {"operation": "unknown"} if the API call fails.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            self.requests += 1
+            try:
+                return to_parsed(await self.complete(SYSTEM_PROMPT, command))
+            except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError):
+                self.failures += 1
+                logger.warning("LLM parse of %r failed", command, exc_info=True)
+                return dict(UNKNOWN)
+            finally:
+                self.in_flight -= 1
+
+    async def parse_batch(self, commands: List[str]) -> List[ParsedCommand]:
+        """
+        Parses several independent commands with a single API call.
+
+        Args:
+            commands (List[str]): The commands, as sent by different users.
+
+        Returns:
+            List[ParsedCommand]: The parse of each command, in order. A
+                command missing from the reply, or every command if the call
+                fails, is parsed as {"operation": "unknown"}.
+        """
+        messages = [{"id": i, "text": command} for i, command in enumerate(commands)]
+        async with self._semaphore:
+            self.in_flight += 1
+            self.requests += 1
+            try:
+                results = (await self.complete(BATCH_SYSTEM_PROMPT, json.dumps(messages)))["results"]
+                parsed = {result["id"]: to_parsed(result) for result in results if isinstance(result, dict)}
+            except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError):
+                self.failures += 1
+                logger.warning("LLM parse of a batch of %d commands failed", len(commands), exc_info=True)
+                parsed = {}
+            finally:
+                self.in_flight -= 1
+        return [parsed.get(i, dict(UNKNOWN)) for i in range(len(commands))]
+
+    async def complete(self, system_prompt: str, prompt: str) -> Any:
+        """
+        Sends one prompt and decodes the JSON the model answers with.
+
+        Args:
+            system_prompt (str): The instructions for the model.
+            prompt (str): The user message.
+
+        Returns:
+            Any: The decoded JSON reply.
+
+        Raises:
+            httpx.HTTPError: If the request fails or times out.
+            ValueError: If the reply is not JSON.
+        """
+        response = await self._client.post("/chat/completions", json={
+            "model": self.model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        })
+        response.raise_for_status()
+        return json.loads(response.json()["choices"][0]["message"]["content"])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports upstream usage.
+
+        Returns:
+            Dict[str, int]: Calls made, failed and in flight, and the concurrency limit.
+        """
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def aclose(self) -> None:
+        """Closes the pooled connections."""
+        await self._client.aclose()
+
+
+class BatchingCommandParser:
+    """
+    Groups commands arriving close together into one LLM call.
+
+    A command waits up to batch_window seconds for others to join it, or
+    less if batch_size commands arrive first; the batch is then parsed by a
+    single AsyncCommandParser.parse_batch() call and each caller receives its
+    own result. This trades a few milliseconds of latency for fewer, larger
+    upstream requests. A caller that is cancelled before its batch is sent
+    drops out of it.
+    """
+
+    def __init__(self, parser: AsyncCommandParser, batch_size: int = 16, batch_window: float = 0.005):
+        """
+        Initialize the batcher.
+
+        Args:
+            parser (AsyncCommandParser): Makes the upstream calls.
+            batch_size (int): Commands that trigger an immediate send.
+            batch_window (float): Seconds the first command of a batch waits for others.
+        """
+        self.parser = parser
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.batches = 0   # Batches sent
+        self.commands = 0  # Commands sent in those batches
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()  # Keeps send tasks referenced until done
+
+    async def parse_command(self, command: str) -> ParsedCommand:
+        """
+        Parses a command as part of the next batch.
+
+        Args:
+            command (str): The user's natural language command.
+
+        Returns:
+            ParsedCommand: Same as AsyncCommandParser.parse_command.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((command, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        batch = [(command, future) for command, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.commands += len(batch)
+        try:
+            if len(batch) == 1:
+                results = [await self.parser.parse_command(batch[0][0])]
+            else:
+                results = await self.parser.parse_batch([command for command, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            # The callers receive the error. Nothing awaits this task, so it
+            # must not end with the error too.
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports upstream usage and how well commands were batched.
+
+        Returns:
+            Dict[str, int]: AsyncCommandParser.stats() plus batches and commands sent.
+        """
+        return {**self.parser.stats(), "batches": self.batches, "batched_commands": self.commands}
+
+
+def to_parsed(reply: Any) -> ParsedCommand:
+    """
+    Converts a {"commands": [...]} reply to the shape CommandParserAgent returns.
+
+    Args:
+        reply (Any): The decoded model reply.
+
+    Returns:
+        ParsedCommand: One command dict, a list of them, or
+            {"operation": "unknown"} if the reply holds no usable command. A
+            command missing a field its operation needs becomes
+            {"operation": "unknown"} too, so it is neither run nor cached.
+    """
+    commands = reply.get("commands", [reply]) if isinstance(reply, dict) else reply
+    if not isinstance(commands, list):
+        return dict(UNKNOWN)
+    commands = [to_command(cmd) for cmd in commands if isinstance(cmd, dict) and isinstance(cmd.get("operation"), str)]
+    if not commands:
+        return dict(UNKNOWN)
+    return commands[0] if len(commands) == 1 else commands
+
+
+def to_command(cmd: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns cmd, or {"operation": "unknown"} if it lacks its item or quantity."""
+    operation = cmd["operation"]
+    if operation in ITEM_OPERATIONS:
+        item = cmd.get("item")
+        if not isinstance(item, str) or not item.strip():
+            return dict(UNKNOWN)
+    if operation in QUANTITY_OPERATIONS:
+        quantity = cmd.get("quantity")
+        if isinstance(quantity, bool) or not isinstance(quantity, (int, float)):
+            return dict(UNKNOWN)
+    return cmd
+
+
+async_command_parser: Union[AsyncCommandParser, BatchingCommandParser] = AsyncCommandParser(
+    base_url=os.getenv("KIRANA_LLM_BASE_URL", "https://api.groq.com/openai/v1"),
+    api_key=os.getenv("GROQ_API_KEY", ""),
+    model=os.getenv("KIRANA_LLM_MODEL", "llama-3.3-70b-versatile"),
+    max_concurrency=int(os.getenv("KIRANA_LLM_CONCURRENCY", "256")),
+    timeout=float(os.getenv("KIRANA_LLM_TIMEOUT", "10")),
+)
+if int(os.getenv("KIRANA_LLM_BATCH_SIZE", "1")) > 1:
+    async_command_parser = BatchingCommandParser(
+        async_command_parser,
+        batch_size=int(os.environ["KIRANA_LLM_BATCH_SIZE"]),
+        batch_window=float(os.getenv("KIRANA_LLM_BATCH_WINDOW", "0.005")),
+    )
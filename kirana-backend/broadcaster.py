@@ -0,0 +1,102 @@
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+
+class Subscription:
+    """
+    Bounded per-connection queue of changes.
+
+    Up to `max_queue` changes are delivered one by one. Beyond that the
+    connection is falling behind, so further changes are coalesced: only the
+    latest change per item is kept until the consumer catches up. Publishing
+    therefore never blocks, however slow the consumer is.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._coalesced: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, change: Dict[str, Any]) -> None:
+        """Queues a change. Must be called on the event loop thread."""
+        if len(self._queue) < self.max_queue and not self._coalesced:
+            self._queue.append(change)
+        else:
+            item = change["item"]
+            key = (change["source"], item.get("id", item.get("name")))
+            self._coalesced.pop(key, None)  # Re-insert so order follows the latest change
+            self._coalesced[key] = change
+        self._ready.set()
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """
+        Waits for and returns every change queued since the last call.
+
+        Returns:
+            List[Dict[str, Any]]: Queued changes followed by coalesced ones.
+        """
+        await self._ready.wait()
+        self._ready.clear()
+        changes = list(self._queue)
+        self._queue.clear()
+        changes.extend(self._coalesced.values())
+        self._coalesced.clear()
+        return changes
+
+
+class Broadcaster:
+    """
+    Fans committed inventory changes out to connected dashboards.
+
+    Writers run on worker threads, so publish() only schedules the fan-out
+    on the event loop and returns; no connection can slow down a writer.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_queue (int): Changes queued per connection before coalescing.
+        """
+        self.max_queue = max_queue
+        self._subscriptions: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self) -> Subscription:
+        """
+        Registers a new connection. Must be called from the event loop.
+
+        Returns:
+            Subscription: The connection's queue.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.max_queue)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Removes a connection's queue."""
+        self._subscriptions.discard(subscription)
+
+    def publish(self, change: Dict[str, Any]) -> None:
+        """
+        Broadcasts a change. Safe to call from any thread.
+
+        Args:
+            change (Dict[str, Any]): The change log entry.
+        """
+        if self._subscriptions and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._fan_out, change)
+            except RuntimeError:
+                pass  # Event loop already closed; nobody is listening
+
+    def _fan_out(self, change: Dict[str, Any]) -> None:
+        for subscription in self._subscriptions:
+            subscription.push(change)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
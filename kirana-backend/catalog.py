@@ -0,0 +1,341 @@
+import threading
+from array import array
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # register_many() binds names one at a time instead
+    np = None
+
+# Batches at least this large are registered with vectorized probing
+BULK_REGISTER_MIN = 256
+
+
+def normalize_name(name: str) -> str:
+    """
+    Canonical form of an item name used for lookups.
+
+    Case and runs of whitespace are ignored, so "Basmati  Rice" and
+    "basmati rice" refer to the same item.
+
+    Args:
+        name (str): The item name as typed by a user.
+
+    Returns:
+        str: The normalized name.
+    """
+    normalized = " ".join(name.split()).casefold()
+    # Hand back the caller's object when nothing changed, so the catalog
+    # does not keep a second copy of already-normalized names.
+    return name if normalized == name else normalized
+
+
+class Catalog:
+    """
+    Assigns dense integer SKU ids to item names.
+
+    Ids start at 1 and grow by one per new normalized name, so they can
+    index arrays directly. An id is never reassigned to another name, which
+    lets the REST item store and the chat inventory refer to the same item
+    by the same id. Across restarts, the loader restores the ids of stored
+    items and reserve()s those of deleted ones.
+
+    Names are found through an open-addressing hash table of 4-byte ids
+    rather than a dict, which would hold a boxed int and a hash entry per
+    name; the names themselves live only in the id -> name list. The hash
+    of each normalized name is kept per id, so a probe only compares names
+    whose hashes match and growing the table never normalizes a name again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # SKU id -> display name (as first registered); id 0 is unused
+        self._names: List[Optional[str]] = [None]
+        # SKU id -> hash of its normalized name
+        self._hashes = array("q", [0])
+        self._count = 0
+        # Hash slot -> SKU id, 0 for an empty slot; at most half full
+        self._table = array("i", bytes(4 * 8))
+
+    def _find(self, table: array, key: str, key_hash: int) -> int:
+        """
+        Probes the table for a normalized name.
+
+        Returns:
+            int: The slot holding the name's id, or the empty slot where it
+                belongs.
+        """
+        # Writers fill in names and hashes before publishing a table, so
+        # reading them after the table sees every id it holds
+        names, hashes = self._names, self._hashes
+        mask = len(table) - 1
+        slot = key_hash & mask
+        while True:
+            sku = table[slot]
+            if not sku:
+                return slot
+            if hashes[sku] == key_hash:
+                name = names[sku]
+                if name == key or normalize_name(name) == key:
+                    return slot
+            slot = (slot + 1) & mask
+
+    def _lookup(self, key: str, key_hash: int) -> Optional[int]:
+        """Returns the id bound to a normalized name, if any."""
+        table = self._table
+        return table[self._find(table, key, key_hash)] or None
+
+    def _grow_ids(self, top: int) -> None:
+        """Makes room for ids below top. The caller holds the lock."""
+        missing = top - len(self._names)
+        if missing > 0:
+            self._names.extend([None] * missing)
+            self._hashes.frombytes(bytes(8 * missing))
+
+    def _bind(self, key_hash: int, name: str, sku: int) -> None:
+        """Binds a new name to a free id. The caller holds the lock."""
+        self._names[sku] = name
+        self._hashes[sku] = key_hash
+        self._count += 1
+        if 2 * self._count > len(self._table):
+            self._table = self._placed(self._table_size(), self._bound_ids())
+        table = self._table
+        mask = len(table) - 1
+        slot = key_hash & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = sku
+
+    def _table_size(self) -> int:
+        """The table size that keeps the table at most half full."""
+        size = len(self._table)
+        while 2 * self._count > size:
+            size *= 2
+        return size
+
+    def _bound_ids(self) -> Sequence[int]:
+        """Every id in the table."""
+        if np is not None:
+            table = np.frombuffer(self._table, dtype=np.int32)
+            return table[table != 0]
+        return [sku for sku in self._table if sku]
+
+    def _placed(self, size: int, skus: Sequence[int]) -> array:
+        """
+        Builds a table of the given size holding the given ids, placed by
+        their stored hashes. The new table is published whole, so lock-free
+        readers never see it half built.
+        """
+        mask = size - 1
+        if np is not None and len(skus) >= BULK_REGISTER_MIN:
+            ids = np.asarray(skus, dtype=np.int64)
+            slots = np.frombuffer(self._hashes, dtype=np.int64)[ids] & mask
+            table = np.zeros(size, dtype=np.int32)
+            # Linear probing in rounds: every id still unplaced tries its
+            # current slot, one of those wanting the same empty slot takes
+            # it (whichever the scatter writes last), and the rest move one
+            # slot on
+            while ids.size:
+                empty = table[slots] == 0
+                table[slots[empty]] = ids[empty]
+                waiting = table[slots] != ids
+                ids, slots = ids[waiting], (slots[waiting] + 1) & mask
+            return array("i", table.tobytes())
+        table = array("i", bytes(4 * size))
+        hashes = self._hashes
+        for sku in skus:
+            slot = hashes[sku] & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = sku
+        return table
+
+    def resolve(self, name: str) -> Optional[int]:
+        """
+        Looks up the SKU id of a name without registering it.
+
+        Args:
+            name (str): The item name.
+
+        Returns:
+            Optional[int]: The SKU id, or None if the name is unknown.
+        """
+        key = normalize_name(name)
+        return self._lookup(key, hash(key))
+
+    def id_for(self, name: str) -> int:
+        """
+        Returns the SKU id of a name, assigning the next id if it is new.
+
+        Args:
+            name (str): The item name.
+
+        Returns:
+            int: The SKU id.
+        """
+        key = normalize_name(name)
+        key_hash = hash(key)
+        sku = self._lookup(key, key_hash)
+        if sku is None:
+            with self._lock:
+                sku = self._lookup(key, key_hash)
+                if sku is None:
+                    sku = len(self._names)
+                    self._grow_ids(sku + 1)
+                    self._bind(key_hash, name, sku)
+        return sku
+
+    def register(self, name: str, sku: int) -> int:
+        """
+        Restores a previously assigned id, e.g. when loading from storage.
+
+        Args:
+            name (str): The item name.
+            sku (int): The id the name had before.
+
+        Returns:
+            int: The id now bound to the name. This is a fresh id if the
+                requested one is taken by another name.
+        """
+        return self.register_many([name], [sku])[0]
+
+    def register_many(self, names: List[str], skus: List[int]) -> List[int]:
+        """
+        Restores previously assigned ids in bulk, taking the lock once.
+
+        Args:
+            names (List[str]): The item names.
+            skus (List[int]): The id each name had before.
+
+        Returns:
+            List[int]: The id now bound to each name; see register().
+        """
+        keys = [normalize_name(name) for name in names]
+        key_hashes = [hash(key) for key in keys]
+        with self._lock:
+            # Size the id space once; ids handed out for collisions go past every requested id
+            self._grow_ids(max(skus, default=0) + 1)
+            if np is not None and len(names) >= BULK_REGISTER_MIN:
+                return self._register_bulk(names, keys, key_hashes, skus)
+            return [self._register_one(*row) for row in zip(names, keys, key_hashes, skus)]
+
+    def _register_one(self, name: str, key: str, key_hash: int, sku: int) -> int:
+        """Binds one name for register_many(). The caller holds the lock."""
+        existing = self._lookup(key, key_hash)
+        if existing is not None:
+            return existing
+        if sku < 1 or self._names[sku] is not None:
+            sku = len(self._names)
+            self._grow_ids(sku + 1)
+        self._bind(key_hash, name, sku)
+        return sku
+
+    def _register_bulk(self, names: List[str], keys: List[str], key_hashes: List[int], skus: List[int]) -> List[int]:
+        """
+        register_many() for a large batch, e.g. every item at startup. The
+        caller holds the lock.
+
+        Probing, finding repeated names and placing ids in the table run
+        vectorized. Names are only compared one by one where a hash matches
+        a bound id or an earlier name of the batch; the rare row whose hash
+        matches a different name goes through _register_one() at the end.
+        """
+        hashes = np.asarray(key_hashes, dtype=np.int64)
+        bound = self._probe(hashes)
+        slow = set()
+        for row in np.flatnonzero(bound).tolist():
+            name = self._names[bound[row]]
+            if name != keys[row] and normalize_name(name) != keys[row]:
+                bound[row] = 0
+                slow.add(row)
+
+        # Rows not bound yet; the first row of each hash binds a new name
+        rows = np.flatnonzero(bound == 0)
+        rows = rows[np.isin(rows, list(slow), invert=True)]
+        _, first, inverse = np.unique(hashes[rows], return_index=True, return_inverse=True)
+        leaders = rows[first][inverse.ravel()]
+        repeats = np.flatnonzero(leaders != rows)
+        for i in repeats.tolist():
+            if keys[rows[i]] != keys[leaders[i]]:
+                slow.add(int(rows[i]))
+        new = rows[np.sort(first)]
+
+        # A new name keeps its requested id if that id is free and no
+        # earlier name of the batch asked for it; the rest get fresh ids
+        requested = np.asarray(skus, dtype=np.int64)[new]
+        keep = np.zeros(new.size, dtype=bool)
+        keep[np.unique(requested, return_index=True)[1]] = True
+        keep &= requested >= 1
+        free = [self._names[sku] is None for sku in requested[keep].tolist()]
+        keep[np.flatnonzero(keep)[np.logical_not(free)]] = False
+        fresh = np.flatnonzero(~keep)
+        requested[fresh] = len(self._names) + np.arange(fresh.size)
+        self._grow_ids(len(self._names) + fresh.size)
+
+        for row, sku in zip(new.tolist(), requested.tolist()):
+            self._names[sku] = names[row]
+        np.frombuffer(self._hashes, dtype=np.int64)[requested] = hashes[new]
+        self._count += new.size
+        self._table = self._placed(self._table_size(), np.concatenate([self._bound_ids(), requested]))
+
+        bound[new] = requested
+        for i in repeats.tolist():
+            if int(rows[i]) not in slow:
+                bound[rows[i]] = bound[leaders[i]]
+        bound = bound.tolist()
+        for row in sorted(slow):
+            bound[row] = self._register_one(names[row], keys[row], key_hashes[row], skus[row])
+        return bound
+
+    def _probe(self, hashes: "np.ndarray") -> "np.ndarray":
+        """
+        Vectorized _find() by hash alone: the first bound id along each
+        hash's probe sequence whose name has the same hash, or 0.
+        """
+        table = np.frombuffer(self._table, dtype=np.int32)
+        stored = np.frombuffer(self._hashes, dtype=np.int64)
+        mask = table.size - 1
+        found = np.zeros(hashes.size, dtype=np.int64)
+        pending = np.arange(hashes.size)
+        slots = hashes & mask
+        while pending.size:
+            ids = table[slots]
+            done = (ids == 0) | (stored[ids] == hashes[pending])
+            found[pending[done]] = ids[done]
+            pending, slots = pending[~done], (slots[~done] + 1) & mask
+        return found
+
+    def reserve(self, max_id: int) -> None:
+        """
+        Keeps every id up to max_id from going to a new name, e.g. the ids
+        of items deleted before a restart.
+
+        Args:
+            max_id (int): The highest id to hold back.
+        """
+        with self._lock:
+            self._grow_ids(max_id + 1)
+
+    def name_of(self, sku: int) -> Optional[str]:
+        """
+        Returns the display name registered for an id.
+
+        Args:
+            sku (int): The SKU id.
+
+        Returns:
+            Optional[str]: The name, or None if the id is unassigned.
+        """
+        return self._names[sku] if 0 <= sku < len(self._names) else None
+
+    @property
+    def max_id(self) -> int:
+        """The largest id assigned so far."""
+        return len(self._names) - 1
+
+    def __len__(self) -> int:
+        return self._count
+
+
+# Shared by the REST item store and the chat inventory
+catalog = Catalog()
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Any, Callable
+
+
+class ChangeLog:
+    """
+    Bounded, in-memory feed of inventory mutations.
+
+    Every mutation is appended with the next value of a process-wide
+    sequence number. Only the most recent `capacity` entries are kept, so a
+    client that falls further behind than that has to resync from scratch.
+    """
+
+    def __init__(self, capacity: int = 10000, first_version: int = 1):
+        """
+        Initialize the change log.
+
+        Args:
+            capacity (int): Number of recent changes retained.
+            first_version (int): The sequence number of the first change. A
+                log rebuilt on every start should pass a value past any
+                number an earlier run handed out.
+        """
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=capacity)
+        self._version = first_version - 1
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Registers a callback invoked with every new change.
+
+        Listeners run on the writer's thread while the log is locked, so they
+        see changes in order but must return quickly and never block.
+
+        Args:
+            listener (Callable[[Dict[str, Any]], None]): The callback.
+        """
+        self._listeners.append(listener)
+
+    @property
+    def version(self) -> int:
+        """Sequence number of the most recent change."""
+        return self._version
+
+    def record(self, source: str, op: str, item: Dict[str, Any]) -> int:
+        """
+        Appends a change.
+
+        Args:
+            source (str): Which store changed ("items" or "inventory").
+            op (str): The operation ("create", "update" or "delete").
+            item (Dict[str, Any]): The item after the change, or its key
+                fields for a delete.
+
+        Returns:
+            int: The sequence number assigned to the change.
+        """
+        with self._lock:
+            self._version += 1
+            change = {"version": self._version, "source": source, "op": op, "item": item}
+            self._entries.append(change)
+            for listener in self._listeners:
+                listener(change)
+            return self._version
+
+    def since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns every change after the given sequence number.
+
+        Args:
+            version (int): The last sequence number the caller has seen.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The changes in order, or None if
+                some of them have already been evicted, or the number is
+                ahead of the log (it came from an earlier run), and the caller
+                must resync.
+        """
+        with self._lock:
+            if version > self._version:
+                return None
+            if version == self._version:
+                return []
+            oldest = self._entries[0]["version"] if self._entries else self._version + 1
+            if version < oldest - 1:
+                return None
+            return list(islice(self._entries, version - oldest + 1, None))
+
+
+# Shared by the REST item store and the chat inventory
+# The log starts empty on every boot. Starting its sequence at the boot time
+# in microseconds puts it past any number a client kept from an earlier run,
+# so that client is told to resync instead of silently missing changes.
+change_log = ChangeLog(
+    int(os.getenv("KIRANA_CHANGE_LOG_SIZE", "10000")),
+    first_version=time.time_ns() // 1000,
+)
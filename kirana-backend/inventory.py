@@ -1,160 +1,761 @@
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+import time
+import threading
+import itertools
+from array import array
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple
+from storage import FIELDS, get_storage
+from change_log import change_log
+from catalog import catalog
+from alerts import alert_dispatcher
+from sorted_index import SortedIndex
+import units
+from units import Unit
 
-# In-memory storage
-inventory_items: Dict[str, Dict] = {}
-inventory: Dict[str, Dict] = {}
+try:
+    import numpy as np
+except ImportError:  # Reports fall back to plain Python loops
+    np = None
 
-def add_item(name: str, quantity: float, unit: str) -> Dict[str, Any]:
+# In-memory inventory, kept in sync with the storage backend. Reads are
+# served from memory; every mutation is written through.
+#
+# Items are stored column-wise: the catalog assigns each item name a dense
+# integer SKU id, and the item's fields live at that index in parallel typed
+# arrays. Compared to a dict of dicts with datetime objects this costs a few
+# dozen bytes per item instead of several hundred. Ids are never reused by
+# another name, so a deleted item that is added again gets its old slot back.
+#
+# Numbers are fixed-point integers: quantities are thousandths of the base
+# unit of the item's dimension (milligrams, microlitres, thousandths of a
+# piece; see units.py) and prices are paise. Adding "500 g" to an item kept
+# in kg, or 0.1 kg ten times, is exact. Decimals and the item's own unit
+# only appear in responses.
+_live = bytearray()                     # 1 if the slot currently holds an item
+_unit_codes = array("H")                # index into _units
+_prices = array("q")                    # paise per one of the item's unit
+_quantities = array("q")                # thousandths of a base unit
+_created_at = array("q")                # epoch seconds
+_updated_at = array("q")                # epoch seconds
+_item_versions = array("q")
+_thresholds = array("q")                # as quantities; below this stock is low
+
+# Units are few and repeated, so items store a small code instead
+_units: List[Unit] = []
+_unit_code_by_name: Dict[str, int] = {}
+
+# Guards slot and unit code allocation
+_alloc_lock = threading.Lock()
+
+_storage = get_storage()
+
+# Source of item versions. Every mutation, deletes included, stamps the item
+# with the next value. Storage keeps the versions of live records and the
+# highest version stamped on a delete, and the counter resumes past both at
+# startup, so versions only grow, even across deletes and restarts.
+_versions = itertools.count(1)
+
+# Mutations of an item happen under one of a fixed set of striped locks, so
+# concurrent commands for the same item are serialized while commands for
+# different items rarely contend.
+_LOCK_STRIPES = 64
+_item_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+def _lock_for(sku: int) -> threading.Lock:
+    """Returns the lock guarding mutations of the given item."""
+    return _item_locks[sku % _LOCK_STRIPES]
+
+# Reorder threshold of items added without one, in the item's unit
+LOW_STOCK_QUANTITY = 5
+
+# Unit of items first added without one, such as "add 10 maggi"
+DEFAULT_UNIT = "pc"
+
+# Running aggregates, kept up to date by every mutation so summaries never
+# have to scan the inventory
+_live_count = 0
+_low_stock_count = 0
+_total_value = 0                        # thousandths of a paisa
+_pending_confirmations = 0
+_stats_lock = threading.Lock()
+
+# Live items ordered by quantity minus threshold, most depleted first, as
+# (key, SKU id) pairs; equal keys are ordered by SKU id. Guarded by
+# _stats_lock.
+_depletion = SortedIndex()
+
+# Rendered list_inventory lines keyed by SKU slot, tagged with the item
+# version they were rendered from; a newer version makes the line stale.
+_rendered_lines: Dict[int, Tuple[int, str]] = {}
+
+# Columnar NumPy snapshot of the live items, tagged with the change log
+# version it was taken at; any later mutation makes it stale.
+_columns_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+def _stock_state(sku: int) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns (quantity, value, threshold) of an item, or None if it is absent.
+    The value is in thousandths of a paisa, and is a pure function of the
+    item's fields, so the running total never drifts.
+    """
+    if not _live[sku]:
+        return None
+    quantity = _quantities[sku]
+    return quantity, _prices[sku] * quantity // _units[_unit_codes[sku]].factor, _thresholds[sku]
+
+def _track_stock(
+    sku: int,
+    old: Optional[Tuple[int, int, int]],
+    new: Optional[Tuple[int, int, int]],
+    alert: bool = True
+) -> None:
+    """
+    Updates the running aggregates and the depletion index for a change to
+    one item, given its _stock_state before and after. Unless alert is
+    False, an item crossing its threshold emits a low-stock alert.
+    """
+    global _live_count, _low_stock_count, _total_value
+    old_key = None if old is None else old[0] - old[2]
+    new_key = None if new is None else new[0] - new[2]
+    was_low = old_key is not None and old_key < 0
+    is_low = new_key is not None and new_key < 0
+    with _stats_lock:
+        _live_count += (new is not None) - (old is not None)
+        _low_stock_count += is_low - was_low
+        _total_value += (new[1] if new else 0) - (old[1] if old else 0)
+        if old_key != new_key:
+            if old_key is not None:
+                _depletion.remove(old_key, sku)
+            if new_key is not None:
+                _depletion.add(new_key, sku)
+    if alert and new is not None and is_low != was_low:
+        unit = _units[_unit_codes[sku]]
+        alert_dispatcher.emit({
+            "sku": sku,
+            "name": catalog.name_of(sku),
+            "state": "low" if is_low else "recovered",
+            "quantity": unit.from_milli(new[0]),
+            "threshold": unit.from_milli(new[2]),
+            "unit": unit.name,
+            "at": time.time()
+        })
+
+def _unit_code(unit: Unit) -> int:
+    """Returns the code for a unit, assigning one on first use."""
+    code = _unit_code_by_name.get(unit.name)
+    if code is None:
+        with _alloc_lock:
+            code = _unit_code_by_name.get(unit.name)
+            if code is None:
+                code = len(_units)
+                _units.append(unit)
+                _unit_code_by_name[unit.name] = code
+    return code
+
+def _input_unit(sku: int, unit: Optional[str]) -> Optional[Unit]:
+    """
+    Resolves the unit a quantity for an existing item is given in.
+
+    A missing unit means the item's own. Returns None if the unit measures
+    something else than the item's (e.g. litres of an item kept in kg).
+    """
+    own = _units[_unit_codes[sku]]
+    if not unit or unit == "unknown":
+        return own
+    given = units.lookup(unit)
+    return given if given.dimension == own.dimension else None
+
+def _unit_mismatch(name: str, sku: int, unit: str) -> Dict[str, Any]:
+    """Builds the response rejecting a quantity given in an incompatible unit."""
+    return {
+        "success": False,
+        "response": f"❌ {name} is measured in {_units[_unit_codes[sku]].name}; {unit} cannot be converted."
+    }
+
+def _ensure_slot(sku: int) -> None:
+    """Grows the arrays so they have a slot for the given SKU id."""
+    if sku < len(_live):
+        return
+    with _alloc_lock:
+        missing = sku + 1 - len(_live)
+        if missing <= 0:
+            return
+        for column in (_unit_codes, _prices, _quantities, _created_at, _updated_at, _item_versions, _thresholds):
+            column.frombytes(bytes(missing * column.itemsize))
+        # Grow _live last: readers use its length as the slot count
+        _live.extend(bytes(missing))
+
+def _new_item_unit(unit: Optional[str]) -> Unit:
+    """
+    Resolves the unit a new item is first added with, which becomes its
+    own. A missing unit means DEFAULT_UNIT rather than a dimension of its
+    own, so later quantities in real units still combine with the item.
+    """
+    if not unit or unit == "unknown":
+        unit = DEFAULT_UNIT
+    return units.lookup(unit)
+
+def _check_new_item(quantity: float, unit: str, threshold: Optional[float]) -> None:
+    """
+    Converts the fields of a new item as add_item() will store them, raising
+    the error the add would fail with, so bad input is rejected before the
+    name takes up a SKU id.
+    """
+    given = _new_item_unit(unit)
+    array("q", [given.to_milli(quantity), given.to_milli(LOW_STOCK_QUANTITY if threshold is None else threshold)])
+
+def _live_sku(name: str) -> Optional[int]:
+    """Returns the SKU id of an item currently in the inventory, if any."""
+    sku = catalog.resolve(name)
+    if sku is None or sku >= len(_live) or not _live[sku]:
+        return None
+    return sku
+
+@contextmanager
+def _locked_live_sku(name: str) -> Iterator[Optional[int]]:
+    """
+    Holds the lock of an item while it is in the inventory, yielding its
+    SKU id, or None if it is not in the inventory.
+
+    A name without an id yet is checked under stripe 0. If a concurrent
+    first add_item() gives it an id and makes it live meanwhile, that add
+    holds the id's own stripe, so the check is retried under that one.
+    """
+    while True:
+        lock = _lock_for(catalog.resolve(name) or 0)
+        with lock:
+            sku = _live_sku(name)
+            if sku is None or _lock_for(sku) is lock:
+                yield sku
+                return
+
+def _format_quantity(quantity: float) -> Any:
+    """Drops the fractional part of whole quantities for display."""
+    return int(quantity) if quantity.is_integer() else quantity
+
+def _to_paise(rupees: float) -> int:
+    """Converts a price in rupees to whole paise."""
+    return round(rupees * 100)
+
+def _to_rupees(paise: int) -> float:
+    """Converts whole paise to rupees for responses."""
+    return paise / 100
+
+def _scatter(target: Any, skus: Any, values: Any) -> None:
+    """Writes values[i] to slot skus[i] of a typed array or bytearray."""
+    if np is not None:
+        dtype = np.uint8 if isinstance(target, bytearray) else target.typecode
+        np.frombuffer(target, dtype=dtype)[skus] = values
+    else:
+        for sku, value in zip(skus, values):
+            target[sku] = value
+
+def _scaled(values: List[float], scales: Any) -> Any:
+    """Rounds values[i] * scales[i] to integers, e.g. decimals to fixed-point."""
+    if np is not None:
+        return np.rint(np.asarray(values, dtype=np.float64) * scales)
+    if isinstance(scales, (int, float)):
+        return [round(value * scales) for value in values]
+    return [round(value * scale) for value, scale in zip(values, scales)]
+
+def _truncated(values: List[float]) -> Any:
+    """Truncates values to integers, as int() does."""
+    if np is not None:
+        return np.asarray(values, dtype=np.float64).astype(np.int64)
+    return [int(value) for value in values]
+
+def _load_inventory() -> None:
+    """
+    Populates the in-memory view from the storage backend.
+
+    Storage hands records back column by column, so each array is filled
+    in one pass instead of one record at a time.
+    """
+    global _versions
+    stored, marks = _storage.load()
+    columns = dict(zip(FIELDS, stored))
+    _versions = itertools.count(max(max(columns["version"], default=0), marks["deleted_version"]) + 1)
+    # The ids of deleted items stay retired, so a REST id keeps meaning one product
+    catalog.reserve(marks["deleted_sku"])
+    if not columns["name"]:
+        return
+    skus = catalog.register_many(columns["name"], columns["sku"])
+    _ensure_slot(max(skus))
+
+    # Units are few and repeated: resolve each spelling once
+    code_of = {spelling: _unit_code(units.lookup(spelling)) for spelling in set(columns["unit"])}
+    codes = [code_of[spelling] for spelling in columns["unit"]]
+    # Storage keeps decimal quantities in the item's unit, readable and
+    # independent of the in-memory scale; same rounding as Unit.to_milli
+    scale_of = [unit.factor * units.QUANTITY_SCALE for unit in _units]
+    if np is not None:
+        # Convert the shared columns once rather than in every _scatter()
+        rows = np.asarray(skus, dtype=np.int64)
+        codes = np.asarray(codes, dtype=np.int64)
+        scales = np.asarray(scale_of, dtype=np.float64)[codes]
+    else:
+        rows = skus
+        scales = [scale_of[code] for code in codes]
+    _scatter(_unit_codes, rows, codes)
+    _scatter(_prices, rows, _scaled(columns["price"], 100))
+    _scatter(_quantities, rows, _scaled(columns["quantity"], scales))
+    _scatter(_thresholds, rows, _scaled(columns["threshold"], scales))
+    _scatter(_created_at, rows, _truncated(columns["created_at"]))
+    _scatter(_updated_at, rows, _truncated(columns["updated_at"]))
+    _scatter(_item_versions, rows, columns["version"])
+    _scatter(_live, rows, 1 if np is not None else [1] * len(skus))
+
+    # A name stored twice under different spellings shares one slot
+    _rebuild_stats(list(dict.fromkeys(skus)))
+
+def _rebuild_stats(skus: List[int]) -> None:
+    """
+    Recomputes the running aggregates and the depletion index from the given
+    live items in one pass, with a single sort, instead of tracking them one
+    item at a time.
+    """
+    global _live_count, _low_stock_count, _total_value
+    if np is not None:
+        rows = np.asarray(skus, dtype=np.int64)
+        quantities = np.frombuffer(_quantities, dtype=np.int64)[rows]
+        prices = np.frombuffer(_prices, dtype=np.int64)[rows]
+        keys = quantities - np.frombuffer(_thresholds, dtype=np.int64)[rows]
+        low = int(np.count_nonzero(keys < 0))
+        factors = np.array([unit.factor for unit in _units], dtype=np.int64)
+        total = _total_value_of(prices, quantities, factors[np.frombuffer(_unit_codes, dtype=np.uint16)[rows]])
+    else:
+        states = [_stock_state(sku) for sku in skus]
+        keys = [quantity - threshold for quantity, _, threshold in states]
+        low = sum(key < 0 for key in keys)
+        total = sum(value for _, value, _ in states)
+    with _stats_lock:
+        _live_count = len(skus)
+        _low_stock_count = low
+        _total_value = total
+        _depletion.build(keys, skus)
+
+def _total_value_of(prices: "np.ndarray", quantities: "np.ndarray", factors: "np.ndarray") -> int:
+    """
+    Sums the values of items given as int64 columns, with the same integer
+    formula as _stock_state. The products are taken in int64 only when none
+    can overflow, and are summed as Python ints, so the sum cannot either.
+    """
+    if not len(prices):
+        return 0
+    if int(np.abs(prices).max()) * int(np.abs(quantities).max()) < 1 << 63:
+        return sum((prices * quantities // factors).tolist())
+    return sum(
+        price * quantity // factor
+        for price, quantity, factor in zip(prices.tolist(), quantities.tolist(), factors.tolist())
+    )
+
+def _persist(sku: int, op: str) -> None:
+    """Stamps a new version on an item, persists it and publishes the change."""
+    name = catalog.name_of(sku)
+    unit = _units[_unit_codes[sku]]
+    quantity = unit.from_milli(_quantities[sku])
+    threshold = unit.from_milli(_thresholds[sku])
+    _item_versions[sku] = next(_versions)
+    _storage.put({
+        "name": name,
+        "unit": unit.name,
+        "price": _to_rupees(_prices[sku]),
+        "quantity": quantity,
+        "created_at": _created_at[sku],
+        "updated_at": _updated_at[sku],
+        "version": _item_versions[sku],
+        "sku": sku,
+        "threshold": threshold
+    })
+    change_log.record("inventory", op, {
+        "sku": sku,
+        "name": name,
+        "quantity": quantity,
+        "unit": unit.name,
+        "price": _to_rupees(_prices[sku]),
+        "threshold": threshold,
+        "version": _item_versions[sku]
+    })
+
+_load_inventory()
+
+def get_item(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Looks up an item in the inventory.
+
+    Args:
+        name (str): The name of the item.
+
+    Returns:
+        Optional[Dict[str, Any]]: The item's fields, or None if it is not in
+            the inventory.
+    """
+    sku = _live_sku(name)
+    if sku is None:
+        return None
+    unit = _units[_unit_codes[sku]]
+    return {
+        "sku": sku,
+        "name": catalog.name_of(sku),
+        "quantity": unit.from_milli(_quantities[sku]),
+        "unit": unit.name,
+        "price": _to_rupees(_prices[sku]),
+        "threshold": unit.from_milli(_thresholds[sku]),
+        "version": _item_versions[sku],
+        "created_at": _created_at[sku],
+        "updated_at": _updated_at[sku]
+    }
+
+def add_item(name: str, quantity: float, unit: str, threshold: Optional[float] = None) -> Dict[str, Any]:
     """
     Adds an item to the inventory.
-    
+
     Args:
         name (str): The name of the item.
         quantity (float): The number of units to add.
-        unit (str): The unit of measurement (kg, litre, etc.).
-        
+        unit (str): The unit of measurement (kg, litre, etc.). Quantities
+            for an existing item are converted to its unit; a new item
+            without one is kept in DEFAULT_UNIT.
+        threshold (Optional[float]): New reorder threshold, in the item's
+            unit. New items default to LOW_STOCK_QUANTITY.
+
     Returns:
         Dict[str, Any]: Response with success status and item details.
     """
     try:
-        # Add to inventory_items if not exists
-        if name not in inventory_items:
-            inventory_items[name] = {
-                "name": name,
-                "unit": unit,
-                "price": 0.0,  # Default price
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            }
-        
-        # Update inventory
-        if name in inventory:
-            inventory[name]["quantity"] += quantity
-            inventory[name]["updated_at"] = datetime.now()
-        else:
-            inventory[name] = {
-                "item_id": name,
-                "quantity": quantity,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
+        sku = catalog.resolve(name)
+        if sku is None:
+            _check_new_item(quantity, unit, threshold)
+            sku = catalog.id_for(name)
+        _ensure_slot(sku)
+        with _lock_for(sku):
+            now = int(time.time())
+            before = _stock_state(sku)
+
+            if before is not None:
+                given = _input_unit(sku, unit)
+                if given is None:
+                    return _unit_mismatch(name, sku, unit)
+                op = "update"
+                _quantities[sku] += given.to_milli(quantity)
+            else:
+                # New item: the unit it is first added with becomes its unit
+                given = _new_item_unit(unit)
+                op = "create"
+                _unit_codes[sku] = _unit_code(given)
+                _prices[sku] = 0  # Default price
+                _quantities[sku] = given.to_milli(quantity)
+                _thresholds[sku] = given.to_milli(LOW_STOCK_QUANTITY)
+                _created_at[sku] = now
+                _live[sku] = 1
+            own = _units[_unit_codes[sku]]
+            if threshold is not None:
+                _thresholds[sku] = own.to_milli(threshold)
+            _updated_at[sku] = now
+            _track_stock(sku, before, _stock_state(sku))
+            _persist(sku, op)
+
+            return {
+                "success": True,
+                "item": {
+                    "id": name,
+                    "sku": sku,
+                    "name": name,
+                    "quantity_added": quantity,
+                    "unit": given.name,
+                    "price": _to_rupees(_prices[sku]),
+                    "threshold": own.from_milli(_thresholds[sku]),
+                    "version": _item_versions[sku]
+                },
+                "response": f"✅ Added {quantity} {given.name} of {name} to inventory."
             }
-        
-        return {
-            "success": True,
-            "item": {
-                "id": name,
-                "name": name,
-                "quantity_added": quantity,
-                "unit": unit,
-                "price": inventory_items[name]["price"]
-            },
-            "response": f"✅ Added {quantity} {unit} of {name} to inventory."
-        }
     except Exception as e:
         return {
             "success": False,
             "response": f"❌ Error adding item: {str(e)}"
         }
 
-def update_item(name: str, quantity: float, unit: str) -> Dict[str, Any]:
+def update_item(
+    name: str,
+    quantity: float,
+    unit: str,
+    expected_version: Optional[int] = None,
+    threshold: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Updates an item's quantity in the inventory.
-    
+
     Args:
         name (str): The name of the item.
         quantity (float): The new quantity.
-        unit (str): The unit of measurement (kg, litre, etc.).
-        
+        unit (str): The unit the quantity is given in. It is converted to
+            the item's unit, which never changes.
+        expected_version (Optional[int]): If given, the update is rejected
+            unless the item is still at this version.
+        threshold (Optional[float]): New reorder threshold in the item's
+            unit, if any.
+
     Returns:
         Dict[str, Any]: Response with success status and item details.
     """
     try:
-        if name not in inventory:
+        with _locked_live_sku(name) as sku:
+            if sku is None:
+                return {
+                    "success": False,
+                    "response": f"❌ Item {name} not found in inventory."
+                }
+            if expected_version is not None and _item_versions[sku] != expected_version:
+                return {
+                    "success": False,
+                    "response": f"❌ Item {name} was changed by someone else. Please retry."
+                }
+
+            given = _input_unit(sku, unit)
+            if given is None:
+                return _unit_mismatch(name, sku, unit)
+
+            own = _units[_unit_codes[sku]]
+            before = _stock_state(sku)
+            _quantities[sku] = given.to_milli(quantity)
+            if threshold is not None:
+                _thresholds[sku] = own.to_milli(threshold)
+            _updated_at[sku] = int(time.time())
+            _track_stock(sku, before, _stock_state(sku))
+            _persist(sku, "update")
+
             return {
-                "success": False,
-                "response": f"❌ Item {name} not found in inventory."
+                "success": True,
+                "item": {
+                    "id": name,
+                    "sku": sku,
+                    "name": name,
+                    "quantity": quantity,
+                    "unit": given.name,
+                    "price": _to_rupees(_prices[sku]),
+                    "threshold": own.from_milli(_thresholds[sku]),
+                    "version": _item_versions[sku]
+                },
+                "response": f"✅ Updated {name} to {quantity} {given.name}."
             }
-        
-        inventory[name]["quantity"] = quantity
-        inventory[name]["updated_at"] = datetime.now()
-        
-        # Update unit in inventory_items if it exists
-        if name in inventory_items:
-            inventory_items[name]["unit"] = unit
-            inventory_items[name]["updated_at"] = datetime.now()
-        
+    except Exception as e:
         return {
-            "success": True,
-            "item": {
-                "id": name,
-                "name": name,
-                "quantity": quantity,
-                "unit": unit,
-                "price": inventory_items[name]["price"]
-            },
-            "response": f"✅ Updated {name} to {quantity} {unit}."
+            "success": False,
+            "response": f"❌ Error updating item: {str(e)}"
         }
+
+def set_threshold(name: str, threshold: float) -> Dict[str, Any]:
+    """
+    Sets an item's reorder threshold.
+
+    Args:
+        name (str): The name of the item.
+        threshold (float): Quantity below which the item is low on stock,
+            in the item's unit.
+
+    Returns:
+        Dict[str, Any]: Response with success status and item details.
+    """
+    try:
+        with _locked_live_sku(name) as sku:
+            if sku is None:
+                return {
+                    "success": False,
+                    "response": f"❌ Item {name} not found in inventory."
+                }
+
+            own = _units[_unit_codes[sku]]
+            before = _stock_state(sku)
+            _thresholds[sku] = own.to_milli(threshold)
+            _updated_at[sku] = int(time.time())
+            _track_stock(sku, before, _stock_state(sku))
+            _persist(sku, "update")
+
+            return {
+                "success": True,
+                "item": {
+                    "id": name,
+                    "sku": sku,
+                    "name": name,
+                    "quantity": own.from_milli(_quantities[sku]),
+                    "threshold": threshold,
+                    "version": _item_versions[sku]
+                },
+                "response": f"✅ {name} will be reported low below {threshold} {own.name}."
+            }
     except Exception as e:
         return {
             "success": False,
-            "response": f"❌ Error updating item: {str(e)}"
+            "response": f"❌ Error setting threshold: {str(e)}"
         }
 
 def delete_item(name: str) -> Dict[str, Any]:
     """
     Deletes an item from the inventory.
-    
+
     Args:
         name (str): The name of the item.
-        
+
     Returns:
         Dict[str, Any]: Response with success status.
     """
     try:
-        if name not in inventory:
+        with _locked_live_sku(name) as sku:
+            if sku is None:
+                return {
+                    "success": False,
+                    "response": f"❌ Item {name} not found in inventory."
+                }
+
+            _track_stock(sku, _stock_state(sku), None)
+            _live[sku] = 0
+            _rendered_lines.pop(sku, None)
+            _item_versions[sku] = next(_versions)
+            _storage.delete(catalog.name_of(sku), _item_versions[sku], sku)
+            alert_dispatcher.forget(sku)
+            change_log.record("inventory", "delete", {
+                "sku": sku,
+                "name": catalog.name_of(sku),
+                "version": _item_versions[sku]
+            })
+
             return {
-                "success": False,
-                "response": f"❌ Item {name} not found in inventory."
+                "success": True,
+                "response": f"✅ Deleted {name} from inventory."
             }
-        
-        del inventory[name]
-        if name in inventory_items:
-            del inventory_items[name]
-        
-        return {
-            "success": True,
-            "response": f"✅ Deleted {name} from inventory."
-        }
     except Exception as e:
         return {
             "success": False,
             "response": f"❌ Error deleting item: {str(e)}"
         }
 
-def list_inventory() -> Dict[str, Any]:
+def _render_line(sku: int) -> str:
+    """
+    Returns the list_inventory line for an item, re-rendering it only when
+    the item changed since it was cached.
+    """
+    version = _item_versions[sku]
+    cached = _rendered_lines.get(sku)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    unit = _units[_unit_codes[sku]]
+    line = f"- {catalog.name_of(sku)}: {_format_quantity(unit.from_milli(_quantities[sku]))} {unit.name}"
+    _rendered_lines[sku] = (version, line)
+    return line
+
+def _page_of_skus(predicate: Optional[Callable[[int], bool]], start: int, stop: int) -> List[int]:
+    """Returns the SKU slots at positions [start, stop) among matching items."""
+    # Slots are only ever appended, so walking them by index is safe while
+    # other threads add items.
+    skus: Iterable[int] = (sku for sku in range(len(_live)) if _live[sku])
+    if predicate is not None:
+        skus = filter(predicate, skus)
+    return list(itertools.islice(skus, start, stop))
+
+def _depleted_skus(
+    predicate: Optional[Callable[[int], bool]],
+    start: int,
+    stop: int,
+    low_stock_only: bool = True
+) -> List[int]:
     """
-    Lists all items in the inventory.
-    
+    Returns the SKU ids at positions [start, stop) among matching items,
+    most depleted first. Without a predicate this is a slice of the
+    depletion index, so it costs O(n / bucket size + k).
+    """
+    with _stats_lock:
+        end = _depletion.count_below(0) if low_stock_only else len(_depletion)
+        if predicate is None:
+            return _depletion.ids(start, min(stop, end)).tolist()
+        candidates = _depletion.ids(0, end)
+    return list(itertools.islice(filter(predicate, candidates), start, stop))
+
+def most_depleted(limit: int = 10, low_stock_only: bool = True) -> List[Dict[str, Any]]:
+    """
+    Lists the items with the least stock relative to their threshold.
+
+    Args:
+        limit (int): Maximum number of items returned.
+        low_stock_only (bool): Only include items below their threshold.
+
+    Returns:
+        List[Dict[str, Any]]: The items, most depleted first.
+    """
+    items = []
+    for sku in _depleted_skus(None, 0, limit, low_stock_only):
+        unit = _units[_unit_codes[sku]]
+        items.append({
+            "sku": sku,
+            "name": catalog.name_of(sku),
+            "quantity": unit.from_milli(_quantities[sku]),
+            "threshold": unit.from_milli(_thresholds[sku]),
+            "unit": unit.name
+        })
+    return items
+
+def list_inventory(
+    page: int = 1,
+    limit: int = 20,
+    name_prefix: Optional[str] = None,
+    unit: Optional[str] = None,
+    low_stock_only: bool = False
+) -> Dict[str, Any]:
+    """
+    Lists one page of items in the inventory, with a summary.
+
+    Args:
+        page (int): The 1-based page number.
+        limit (int): Items per page.
+        name_prefix (Optional[str]): Only list items whose name starts with this.
+        unit (Optional[str]): Only list items measured in this unit.
+        low_stock_only (bool): Only list items below their threshold, most
+            depleted first.
+
     Returns:
-        Dict[str, Any]: Response with success status and inventory list.
+        Dict[str, Any]: Response with success status, the inventory list and
+            a summary of item and low-stock counts.
     """
     try:
-        if not inventory:
+        total = _live_count
+        summary = {
+            "count": total,
+            "low_stock": _low_stock_count,
+            "page": page,
+            "limit": limit,
+            "has_more": False
+        }
+        if not total:
             return {
                 "success": True,
-                "response": "📦 Inventory is empty."
+                "response": "📦 Inventory is empty.",
+                "summary": summary
             }
-        
-        # Format the inventory list
-        inventory_list = "📦 Current Inventory:\n"
-        for name, data in inventory.items():
-            unit = inventory_items.get(name, {}).get("unit", "units")
-            inventory_list += f"- {name}: {data['quantity']} {unit}\n"
-        
+
+        checks = []
+        if name_prefix:
+            prefix = name_prefix.lower()
+            checks.append(lambda sku: catalog.name_of(sku).lower().startswith(prefix))
+        if unit:
+            found = units.find(unit)
+            code = _unit_code_by_name.get(found.name, -1) if found is not None else -1
+            checks.append(lambda sku: _unit_codes[sku] == code)
+        predicate = (lambda sku: all(check(sku) for check in checks)) if checks else None
+
+        # Fetch one extra item to learn whether another page follows
+        start = (max(page, 1) - 1) * limit
+        if low_stock_only:
+            skus = _depleted_skus(predicate, start, start + limit + 1)
+        else:
+            skus = _page_of_skus(predicate, start, start + limit + 1)
+        summary["has_more"] = len(skus) > limit
+        lines = map(_render_line, skus[:limit])
+
+        header = f"📦 Current Inventory ({total} items, {_low_stock_count} low on stock) - page {page}:"
+        footer = f"\n➡️ More items on page {page + 1}." if summary["has_more"] else ""
         return {
             "success": True,
-            "response": inventory_list
+            "response": "\n".join(itertools.chain((header,), lines)) + "\n" + footer,
+            "summary": summary
         }
     except Exception as e:
         return {
@@ -162,4 +763,116 @@ def list_inventory() -> Dict[str, Any]:
             "response": f"❌ Error listing inventory: {str(e)}"
         }
 
+def track_pending_confirmations(delta: int) -> None:
+    """
+    Adjusts the number of parsed commands awaiting a yes/no confirmation.
+
+    Args:
+        delta (int): Commands queued (positive) or resolved (negative).
+    """
+    global _pending_confirmations
+    with _stats_lock:
+        _pending_confirmations += delta
+
+def dashboard_summary() -> Dict[str, Any]:
+    """
+    Returns the running dashboard aggregates without scanning the inventory.
+
+    Returns:
+        Dict[str, Any]: Item count, total stock value, number of items below
+            their threshold and confirmations awaiting an answer.
+    """
+    with _stats_lock:
+        return {
+            "sku_count": _live_count,
+            "total_value": round(_to_rupees(_total_value / 1000), 2),
+            "low_stock": _low_stock_count,
+            "pending_confirmations": _pending_confirmations
+        }
+
+def columns() -> Dict[str, Any]:
+    """
+    Returns a columnar snapshot of the items currently in the inventory.
+
+    The snapshot is copied out of the typed arrays once and reused until the
+    next mutation, so reports can run as vectorized reductions. Requires
+    NumPy.
+
+    Returns:
+        Dict[str, Any]: NumPy arrays "sku", "quantity", "price", "threshold",
+            "unit_code" and "unit_factor", one row per item in SKU id order.
+            Quantities and thresholds are in thousandths of a base unit and
+            prices in paise; dividing by "unit_factor" times
+            units.QUANTITY_SCALE converts quantities to each item's unit. Unit codes
+            index the "units" list.
+    """
+    global _columns_cache
+    # Read the version first: a write racing with the copy bumps it afterwards
+    version = change_log.version
+    cached = _columns_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    # Copy under the allocation lock; an array cannot grow while exported
+    with _alloc_lock:
+        skus = np.flatnonzero(np.frombuffer(_live, dtype=np.uint8))
+        view = {
+            "sku": skus,
+            "quantity": np.frombuffer(_quantities, dtype=np.int64)[skus],
+            "price": np.frombuffer(_prices, dtype=np.int64)[skus],
+            "threshold": np.frombuffer(_thresholds, dtype=np.int64)[skus],
+            "unit_code": np.frombuffer(_unit_codes, dtype=np.uint16)[skus],
+            "units": list(_units)
+        }
+    view["unit_factor"] = np.array([unit.factor for unit in view["units"]], dtype=np.int64)[view["unit_code"]]
+    _columns_cache = (version, view)
+    return view
+
+def stock_report() -> Dict[str, Any]:
+    """
+    Aggregates the whole inventory for dashboards and reports.
+
+    Returns:
+        Dict[str, Any]: Item count, total stock value, number of items below
+            their threshold, and total quantity per base unit (g, ml, pc).
+    """
+    per_unit: Dict[str, int] = {}
+    if np is not None:
+        view = columns()
+        quantity = view["quantity"]
+        # Sum per unit code, then fold codes of one dimension together. The
+        # sums stay in int64: bincount weights are float64, which rounds
+        # totals past 2**53 thousandths.
+        per_code = np.zeros(len(view["units"]), dtype=np.int64)
+        np.add.at(per_code, view["unit_code"], quantity)
+        for unit, total in zip(view["units"], per_code):
+            base = units.base_unit(unit.dimension)
+            per_unit[base] = per_unit.get(base, 0) + int(total)
+        count = int(len(quantity))
+        # Same integer formula as _stock_state, so this matches the running total
+        total_value = _total_value_of(view["price"], quantity, view["unit_factor"])
+        low_stock = int(np.count_nonzero(quantity < view["threshold"]))
+    else:
+        count = 0
+        total_value = 0
+        low_stock = 0
+        for sku in range(len(_live)):
+            state = _stock_state(sku)
+            if state is None:
+                continue
+            quantity, value, threshold = state
+            base = units.base_unit(_units[_unit_codes[sku]].dimension)
+            count += 1
+            total_value += value
+            low_stock += quantity < threshold
+            per_unit[base] = per_unit.get(base, 0) + quantity
+    return {
+        "count": count,
+        "total_value": round(_to_rupees(total_value / 1000), 2),
+        "low_stock": low_stock,
+        "quantity_by_unit": {
+            unit: _format_quantity(total / units.QUANTITY_SCALE) for unit, total in per_unit.items() if total
+        }
+    }
+
 # Note: You will need separate functions/endpoints to manage the inventory_items table (add, update, delete item types with prices and default units).
@@ -1,10 +1,14 @@
-from inventory import add_item, update_item, delete_item, list_inventory
-from typing import Dict, Any
+from inventory import (
+    add_item, update_item, delete_item, list_inventory, set_threshold, most_depleted,
+    track_pending_confirmations
+)
+from catalog import catalog
+from typing import Dict, Any, List, Optional
 
 class InventoryToolkit:
     """A toolkit for managing inventory with CRUD operations, including unit types."""
 
-    def add_item(self, name: str, quantity: float, unit: str) -> Dict[str, Any]:
+    def add_item(self, name: str, quantity: float, unit: str, threshold: Optional[float] = None) -> Dict[str, Any]:
         """
         Adds an item to the inventory.
 
@@ -12,6 +16,7 @@ class InventoryToolkit:
             name (str): The name of the item.
             quantity (float): The number of units to add.
             unit (str): The unit of measurement (kg, litre, etc.).
+            threshold (Optional[float]): Reorder threshold, if given.
 
         Returns:
             Dict[str, Any]: Response with success status and item details.
@@ -19,9 +24,16 @@ class InventoryToolkit:
         if not unit:
             unit = "unknown"  # Default to "unknown" if no unit is provided
 
-        return add_item(name, quantity, unit)
+        return add_item(name, quantity, unit, threshold)
 
-    def update_item(self, name: str, quantity: float, unit: str) -> Dict[str, Any]:
+    def update_item(
+        self,
+        name: str,
+        quantity: float,
+        unit: str,
+        expected_version: Optional[int] = None,
+        threshold: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Updates an item's quantity in the inventory.
 
@@ -29,6 +41,8 @@ class InventoryToolkit:
             name (str): The name of the item.
             quantity (float): The new quantity.
             unit (str): The unit of measurement (kg, litre, etc.).
+            expected_version (Optional[int]): Version the caller last saw, if any.
+            threshold (Optional[float]): Reorder threshold, if given.
 
         Returns:
             Dict[str, Any]: Response with success status and item details.
@@ -36,7 +50,56 @@ class InventoryToolkit:
         if not unit:
             unit = "unknown"
 
-        return update_item(name, quantity, unit)
+        return update_item(name, quantity, unit, expected_version, threshold)
+
+    def set_threshold(self, name: str, threshold: float) -> Dict[str, Any]:
+        """
+        Sets the quantity below which an item is reported low on stock.
+
+        Args:
+            name (str): The name of the item.
+            threshold (float): The reorder threshold.
+
+        Returns:
+            Dict[str, Any]: Response with success status and item details.
+        """
+        return set_threshold(name, threshold)
+
+    def most_depleted(self, limit: int = 10, low_stock_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Lists the items with the least stock relative to their threshold.
+
+        Args:
+            limit (int): Maximum number of items returned.
+            low_stock_only (bool): Only include items below their threshold.
+
+        Returns:
+            List[Dict[str, Any]]: The items, most depleted first.
+        """
+        return most_depleted(limit, low_stock_only)
+
+    def resolve_sku(self, name: str) -> Optional[int]:
+        """
+        Looks up the catalog SKU id of an item name.
+
+        The same id addresses the item in the REST API (/items/{id}).
+
+        Args:
+            name (str): The name of the item, in any case or spacing.
+
+        Returns:
+            Optional[int]: The SKU id, or None if the item was never added.
+        """
+        return catalog.resolve(name)
+
+    def track_pending_confirmations(self, delta: int) -> None:
+        """
+        Reports commands queued for or resolved from confirmation.
+
+        Args:
+            delta (int): Change in the number of commands awaiting yes/no.
+        """
+        track_pending_confirmations(delta)
 
     def delete_item(self, name: str) -> Dict[str, Any]:
         """
@@ -50,11 +113,25 @@ class InventoryToolkit:
         """
         return delete_item(name)
 
-    def list_inventory(self) -> Dict[str, Any]:
+    def list_inventory(
+        self,
+        page: int = 1,
+        limit: int = 20,
+        name_prefix: Optional[str] = None,
+        unit: Optional[str] = None,
+        low_stock_only: bool = False
+    ) -> Dict[str, Any]:
         """
-        Lists all items in the inventory, including unit type.
+        Lists one page of items in the inventory, including unit type.
+
+        Args:
+            page (int): The 1-based page number.
+            limit (int): Items per page.
+            name_prefix (Optional[str]): Only list items whose name starts with this.
+            unit (Optional[str]): Only list items measured in this unit.
+            low_stock_only (bool): Only list items below their threshold, most depleted first.
 
         Returns:
-            Dict[str, Any]: Response with success status and inventory list.
+            Dict[str, Any]: Response with success status, inventory list and summary.
         """
-        return list_inventory()
+        return list_inventory(page, limit, name_prefix, unit, low_stock_only)
@@ -0,0 +1,320 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Iterable, Tuple, Callable
+
+
+class VersionConflict(Exception):
+    """Raised when a conditional write targets an outdated item version."""
+
+
+class ItemStore:
+    """
+    Thread-safe, id-indexed store backing the /items REST endpoints.
+
+    Records are kept in a dict keyed by item id, which gives O(1) lookups
+    and replacements. A sorted list of ids orders listings and lets pages
+    resume from an id cursor with a binary search. Stored records are never
+    mutated in place; updates replace them.
+
+    Every write stamps the record with a "version" taken from a store-wide
+    counter, so versions only grow, even when an id is deleted and reused.
+    Writers may pass the version they last read to reject stale updates.
+    """
+
+    # Records page() copies out per hold of the lock when filtering
+    SCAN_CHUNK = 1024
+
+    def __init__(
+        self,
+        items: Iterable[Dict[str, Any]] = (),
+        on_change: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        first_version: int = 1,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            items (Iterable[Dict[str, Any]]): Initial records, each with an "id".
+            on_change (Optional[Callable]): Called with the operation ("create",
+                "update" or "delete") and record after every write. It runs
+                under the store lock, so calls arrive in commit order.
+            first_version (int): The version stamped by the first write. A
+                store rebuilt on every start should pass a value past any
+                version an earlier run handed out.
+        """
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._ids: List[int] = []
+        self._version = first_version - 1
+        for item in items:
+            self._version += 1
+            self._items[item["id"]] = {**item, "version": self._version}
+        self._ids = sorted(self._items)
+
+    @property
+    def version(self) -> int:
+        """The version stamped by the most recent write to the store."""
+        return self._version
+
+    def list_items(self) -> List[Dict[str, Any]]:
+        """
+        Lists every item ordered by id.
+
+        Returns:
+            List[Dict[str, Any]]: The stored records.
+        """
+        with self._lock:
+            return [self._items[item_id] for item_id in self._ids]
+
+    def page(
+        self,
+        after: Optional[int] = None,
+        limit: int = 100,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Returns one page of items ordered by id.
+
+        The page starts right after the cursor, located by binary search, so
+        its cost does not depend on how many items precede it. Records are
+        copied out under the lock at most SCAN_CHUNK at a time and filtered
+        after it is released, so a selective predicate scanning much of the
+        store never holds up writers.
+
+        Args:
+            after (Optional[int]): Only return items with a greater id.
+            limit (int): Maximum number of items to return.
+            predicate (Optional[Callable]): Filter applied to each record.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[int]]: The records, and the
+                cursor for the next page, or None if this is the last page.
+        """
+        chunk = limit if predicate is None else max(limit, self.SCAN_CHUNK)
+        records: List[Dict[str, Any]] = []
+        while True:
+            with self._lock:
+                start = 0 if after is None else bisect_right(self._ids, after)
+                batch = [self._items[item_id] for item_id in self._ids[start:start + chunk]]
+                more = start + len(batch) < len(self._ids)
+            for position, record in enumerate(batch, 1):
+                if predicate is None or predicate(record):
+                    records.append(record)
+                    if len(records) == limit:
+                        return records, record["id"] if more or position < len(batch) else None
+            if not more or not batch:
+                return records, None
+            # Resume after the last id scanned, wherever writes moved it
+            after = batch[-1]["id"]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Captures a consistent view of every item, ordered by id.
+
+        Only references are copied under the lock; since records are never
+        mutated, later writes cannot change the snapshot. Sorting happens
+        after the lock is released so writers are not held up.
+
+        Returns:
+            List[Dict[str, Any]]: The records as of the call.
+        """
+        with self._lock:
+            records = list(self._items.values())
+        records.sort(key=itemgetter("id"))
+        return records
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Looks up an item by id.
+
+        Args:
+            item_id (int): The item id.
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if it does not exist.
+        """
+        return self._items.get(item_id)
+
+    def _check_version(self, item_id: int, expected_version: Optional[int]) -> None:
+        if expected_version is not None and self._items[item_id]["version"] != expected_version:
+            raise VersionConflict(f"Item {item_id} is no longer at version {expected_version}")
+
+    def _put(self, item: Dict[str, Any], op: str) -> Dict[str, Any]:
+        """Stamps and stores a record. Caller must hold the lock."""
+        self._version += 1
+        record = self._items[item["id"]] = {**item, "version": self._version}
+        if op == "create":
+            insort(self._ids, item["id"])
+        if self._on_change is not None:
+            self._on_change(op, record)
+        return record
+
+    def _remove(self, item_id: int) -> None:
+        """Deletes a record. Caller must hold the lock."""
+        record = self._items.pop(item_id)
+        del self._ids[bisect_left(self._ids, item_id)]
+        self._version += 1
+        if self._on_change is not None:
+            self._on_change("delete", record)
+
+    def create(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Adds a new item.
+
+        Args:
+            item (Dict[str, Any]): The record to add.
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored record, or None if an item
+                with the same id already exists.
+        """
+        with self._lock:
+            if item["id"] in self._items:
+                return None
+            return self._put(item, "create")
+
+    def replace(self, item_id: int, item: Dict[str, Any], expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Replaces an existing item.
+
+        Args:
+            item_id (int): The id of the item to replace.
+            item (Dict[str, Any]): The new record.
+            expected_version (Optional[int]): If given, the version the item
+                must still be at.
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored record, or None if the item
+                does not exist.
+
+        Raises:
+            VersionConflict: If the item has moved past expected_version.
+        """
+        with self._lock:
+            if item_id not in self._items:
+                return None
+            self._check_version(item_id, expected_version)
+            return self._put(item, "update")
+
+    def delete(self, item_id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Deletes an item.
+
+        Args:
+            item_id (int): The id of the item to delete.
+            expected_version (Optional[int]): If given, the version the item
+                must still be at.
+
+        Returns:
+            bool: False if the item does not exist.
+
+        Raises:
+            VersionConflict: If the item has moved past expected_version.
+        """
+        with self._lock:
+            if item_id not in self._items:
+                return False
+            self._check_version(item_id, expected_version)
+            self._remove(item_id)
+            return True
+
+    def _apply(self, ops: List[Dict[str, Any]], check, apply) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Runs a batch of row operations as a single all-or-nothing transaction.
+
+        Every row is checked under the store lock before any row is applied,
+        so either the whole batch becomes visible at once or none of it does.
+        """
+        with self._lock:
+            seen = set()
+            statuses = []
+            for op in ops:
+                if op["id"] in seen:
+                    statuses.append("duplicate")
+                else:
+                    seen.add(op["id"])
+                    statuses.append(check(op))
+            if any(status is not None for status in statuses):
+                return False, [
+                    {"id": op["id"], "status": status or "aborted"}
+                    for op, status in zip(ops, statuses)
+                ]
+            return True, [apply(op) for op in ops]
+
+    def create_many(self, items: List[Dict[str, Any]]) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Adds several items in one transaction.
+
+        Args:
+            items (List[Dict[str, Any]]): The records to add.
+
+        Returns:
+            Tuple[bool, List[Dict[str, Any]]]: Whether the batch was applied,
+                and one result per row with its "id" and "status".
+        """
+        def check(item):
+            return "exists" if item["id"] in self._items else None
+
+        def apply(item):
+            record = self._put(item, "create")
+            return {"id": item["id"], "status": "created", "version": record["version"]}
+
+        return self._apply(items, check, apply)
+
+    def replace_many(self, items: List[Dict[str, Any]]) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Replaces several items in one transaction.
+
+        Args:
+            items (List[Dict[str, Any]]): The new records. A record carrying a
+                "version" is only applied if the item is still at that version.
+
+        Returns:
+            Tuple[bool, List[Dict[str, Any]]]: Whether the batch was applied,
+                and one result per row with its "id" and "status".
+        """
+        def check(item):
+            current = self._items.get(item["id"])
+            if current is None:
+                return "not_found"
+            if item.get("version") is not None and current["version"] != item["version"]:
+                return "conflict"
+            return None
+
+        def apply(item):
+            fields = {key: value for key, value in item.items() if key != "version"}
+            record = self._put(fields, "update")
+            return {"id": item["id"], "status": "updated", "version": record["version"]}
+
+        return self._apply(items, check, apply)
+
+    def delete_many(self, refs: List[Dict[str, Any]]) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Deletes several items in one transaction.
+
+        Args:
+            refs (List[Dict[str, Any]]): Rows with an "id" and an optional
+                expected "version".
+
+        Returns:
+            Tuple[bool, List[Dict[str, Any]]]: Whether the batch was applied,
+                and one result per row with its "id" and "status".
+        """
+        def check(ref):
+            current = self._items.get(ref["id"])
+            if current is None:
+                return "not_found"
+            if ref.get("version") is not None and current["version"] != ref["version"]:
+                return "conflict"
+            return None
+
+        def apply(ref):
+            self._remove(ref["id"])
+            return {"id": ref["id"], "status": "deleted"}
+
+        return self._apply(refs, check, apply)
+
+    def __len__(self) -> int:
+        return len(self._items)
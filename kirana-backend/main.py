@@ -1,7 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import List, Optional, Callable, Tuple, Iterator
+import csv
+import io
+import json
+import os
+import time
+from item_store import ItemStore, VersionConflict
+from response_cache import ResponseCache
+from change_log import change_log
+from broadcaster import Broadcaster
+from catalog import catalog, normalize_name
+# Restores the chat inventory's SKU ids before any REST item claims one
+from inventory import get_item as get_stock, stock_report, dashboard_summary, most_depleted, set_threshold
+from agent import AgentSessions
+from parse_cache import parse_cache, parse_flights
+from async_parser import async_command_parser
+import asyncio
 
 app = FastAPI()
 
@@ -12,37 +31,523 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 class Item(BaseModel):
-    id: int
+    id: Optional[int] = None  # Catalog SKU id; assigned from the name if omitted
     name: str
     quantity: int
+    unit: str = "units"
+
+class VersionedItem(Item):
+    version: Optional[int] = None  # Expected current version, if any
+
+class ItemRef(BaseModel):
+    id: int
+    version: Optional[int] = None  # Expected current version, if any
+
+class Threshold(BaseModel):
+    threshold: float = Field(ge=0)
+
+class TextCommand(BaseModel):
+    command: str
+    session_id: Optional[str] = None  # Chat session awaiting confirmations; the client address if omitted
+
+# Bulk bodies are validated in a single pass straight from the raw JSON bytes
+items_adapter = TypeAdapter(List[Item])
+versioned_items_adapter = TypeAdapter(List[VersionedItem])
+item_refs_adapter = TypeAdapter(List[ItemRef])
+
+inventory = ItemStore(
+    [
+        {"id": catalog.id_for("Rice"), "name": "Rice", "quantity": 10, "unit": "kg"},
+        {"id": catalog.id_for("Wheat"), "name": "Wheat", "quantity": 20, "unit": "kg"},
+    ],
+    on_change=lambda op, record: change_log.record("items", op, record),
+    # The store is rebuilt on every start. Starting its versions at the boot
+    # time in microseconds keeps an ETag from an earlier run from matching
+    # (and getting a 304 or passing If-Match) in this one.
+    first_version=time.time_ns() // 1000,
+)
+
+# Handles the chat commands sent to /text-command, one agent per chat session
+agent_sessions = AgentSessions(int(os.getenv("KIRANA_CHAT_SESSIONS", "1000")))
+
+# Fields a client may project in GET /items, and the default projection
+ITEM_FIELDS = ("id", "name", "quantity", "unit", "version")
+DEFAULT_ITEM_FIELDS = ("id", "name", "quantity", "unit")
+
+# Rows serialized per chunk of a streamed export
+EXPORT_CHUNK_SIZE = 1000
+
+# Serialized GET /items pages, valid until the next write to the store
+page_cache = ResponseCache()
+
+# Pushes every committed change to connected dashboards
+broadcaster = Broadcaster()
+change_log.subscribe(broadcaster.publish)
+
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE_INTERVAL = 15
+
+def etag(version: int) -> str:
+    """Formats an item version as a strong ETag."""
+    return f'"{version}"'
 
-inventory = [
-    {"id": 1, "name": "Rice", "quantity": 10},
-    {"id": 2, "name": "Wheat", "quantity": 20},
-]
+def etag_matches(header: Optional[str], tag: str) -> bool:
+    """Checks whether an If-None-Match header lists the given ETag."""
+    if header is None:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == tag:
+            return True
+    return False
+
+def expected_version(if_match: Optional[str]) -> Optional[int]:
+    """
+    Extracts the version a conditional request expects from If-Match.
+
+    Args:
+        if_match (Optional[str]): The raw If-Match header.
+
+    Returns:
+        Optional[int]: The expected version, or None for an unconditional write.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed If-Match header")
+
+def id_matches(item: dict, create: bool) -> bool:
+    """
+    Checks an item's id against the catalog without registering anything.
+
+    Args:
+        item (dict): The item; its id may be omitted.
+        create (bool): Whether a name new to the catalog is acceptable.
+
+    Returns:
+        bool: False if the item carries an id that belongs to another name,
+            or its name is new and it carries an id anyway, or (when not
+            creating) its name is not in the catalog.
+    """
+    sku = catalog.resolve(item["name"])
+    if sku is None:
+        return create and item["id"] is None
+    return item["id"] in (None, sku)
+
+def bind_id(item: dict, create: bool) -> bool:
+    """
+    Sets an item's id to the catalog SKU id of its name.
+
+    Ids follow names, so the REST items and the chat inventory agree on
+    which id an item has. A new name is only registered once the item has
+    passed id_matches(), so rejected items do not use up ids.
+
+    Args:
+        item (dict): The item; its id may be omitted.
+        create (bool): Register the name in the catalog if it is new.
+
+    Returns:
+        bool: False if id_matches() rejects the item.
+    """
+    if not id_matches(item, create):
+        return False
+    item["id"] = catalog.id_for(item["name"])
+    return True
+
+def bind_ids(items: List[dict], create: bool) -> Optional[JSONResponse]:
+    """
+    Binds every row of a bulk request, or returns the 409 rejecting the batch.
+
+    Every row is checked before any name is registered, so a rejected batch
+    leaves no new ids behind in the catalog.
+    """
+    seen = set()
+    statuses = []
+    for item in items:
+        name = normalize_name(item["name"])
+        if name in seen:
+            statuses.append("duplicate")
+        else:
+            seen.add(name)
+            statuses.append(None if id_matches(item, create) else "id_mismatch")
+    if any(status is not None for status in statuses):
+        return bulk_response(False, [
+            {
+                "id": item["id"] if item["id"] is not None else catalog.resolve(item["name"]),
+                "status": status or "aborted",
+            }
+            for item, status in zip(items, statuses)
+        ])
+    for item in items:
+        bind_id(item, create)
+    return None
+
+def item_filter(
+    name_prefix: Optional[str],
+    min_quantity: Optional[int],
+    max_quantity: Optional[int],
+    unit: Optional[str],
+) -> Optional[Callable[[dict], bool]]:
+    """Builds a predicate matching every given filter, or None if there are none."""
+    checks = []
+    if name_prefix:
+        prefix = name_prefix.lower()
+        checks.append(lambda record: record["name"].lower().startswith(prefix))
+    if min_quantity is not None:
+        checks.append(lambda record: record["quantity"] >= min_quantity)
+    if max_quantity is not None:
+        checks.append(lambda record: record["quantity"] <= max_quantity)
+    if unit:
+        checks.append(lambda record: record["unit"] == unit)
+    if not checks:
+        return None
+    return lambda record: all(check(record) for check in checks)
+
+def projection(fields: Optional[str]) -> Tuple[str, ...]:
+    """Parses the comma-separated fields parameter of GET /items."""
+    if not fields:
+        return DEFAULT_ITEM_FIELDS
+    selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [field for field in selected if field not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
 
 @app.get("/items", response_model=List[Item])
-def get_items():
-    return inventory
+def get_items(
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    name_prefix: Optional[str] = None,
+    min_quantity: Optional[int] = None,
+    max_quantity: Optional[int] = None,
+    unit: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Lists one page of items ordered by id.
+
+    Pass the X-Next-Cursor response header back as cursor to fetch the next
+    page; the header is absent on the last page. The ETag tracks the store
+    version, so a client polling with If-None-Match gets 304 until any item
+    changes. Rendered pages are cached until the next write.
+    """
+    version = inventory.version
+    tag = etag(version)
+    if etag_matches(if_none_match, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+
+    key = (cursor, limit, name_prefix, min_quantity, max_quantity, unit, fields)
+    cached = page_cache.get(key, version)
+    if cached is None:
+        selected = projection(fields)
+        records, next_cursor = inventory.page(
+            cursor, limit, item_filter(name_prefix, min_quantity, max_quantity, unit)
+        )
+        body = json.dumps(
+            [{field: record[field] for field in selected} for record in records],
+            separators=(",", ":"),
+        ).encode()
+        cached = (body, next_cursor)
+        page_cache.put(key, version, cached)
+
+    body, next_cursor = cached
+    headers = {"ETag": tag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def parse_bulk(body: bytes, adapter: TypeAdapter) -> List[dict]:
+    """Validates a bulk request body and returns its rows as plain dicts."""
+    try:
+        rows = adapter.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+    return [row.dict() for row in rows]
+
+async def run_bulk(request: Request, adapter: TypeAdapter, apply: Callable[[List[dict]], JSONResponse]) -> JSONResponse:
+    """
+    Reads a bulk request body, then validates and applies it on the threadpool.
+
+    Only the read happens on the event loop; validating and applying
+    thousands of rows would otherwise stall every other request.
+    """
+    body = await request.body()
+    return await run_in_threadpool(lambda: apply(parse_bulk(body, adapter)))
+
+def bulk_response(applied: bool, results: List[dict]) -> JSONResponse:
+    """Reports a bulk result; a rejected batch answers 409 and changes nothing."""
+    return JSONResponse(
+        status_code=200 if applied else 409,
+        content={"applied": applied, "results": results},
+    )
+
+@app.post("/items/bulk")
+async def add_items(request: Request):
+    return await run_bulk(request, items_adapter, lambda items: (
+        bind_ids(items, create=True) or bulk_response(*inventory.create_many(items))
+    ))
+
+@app.put("/items/bulk")
+async def update_items(request: Request):
+    return await run_bulk(request, versioned_items_adapter, lambda items: (
+        bind_ids(items, create=False) or bulk_response(*inventory.replace_many(items))
+    ))
+
+@app.delete("/items/bulk")
+async def delete_items(request: Request):
+    return await run_bulk(request, item_refs_adapter, lambda refs: bulk_response(*inventory.delete_many(refs)))
+
+def export_ndjson(records: List[dict]) -> Iterator[str]:
+    """Serializes records as newline-delimited JSON, one chunk at a time."""
+    for start in range(0, len(records), EXPORT_CHUNK_SIZE):
+        chunk = records[start:start + EXPORT_CHUNK_SIZE]
+        yield "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in chunk)
+
+def export_csv(records: List[dict]) -> Iterator[str]:
+    """Serializes records as CSV with a header row, one chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ITEM_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for start in range(0, len(records), EXPORT_CHUNK_SIZE):
+        writer.writerows(records[start:start + EXPORT_CHUNK_SIZE])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.get("/items/export")
+def export_items(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Streams every item from a consistent snapshot of the store.
+
+    The snapshot shares records with the store, so only the current chunk
+    is materialized as text and writers are never blocked by the export.
+    """
+    records = inventory.snapshot()
+    if format == "csv":
+        body, media_type = export_csv(records), "text/csv"
+    else:
+        body, media_type = export_ndjson(records), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="items.{format}"'},
+    )
+
+@app.get("/items/changes")
+def get_changes(since: int = Query(..., ge=0)):
+    """
+    Lists every item and inventory mutation after the given change version.
+
+    Clients remember the returned version and pass it as since on the next
+    call. If the feed no longer reaches back that far, the response has
+    resync set and the client should refetch everything.
+    """
+    version = change_log.version
+    changes = change_log.since(since)
+    if changes is None:
+        return {"version": version, "resync": True, "changes": []}
+    if changes:
+        version = changes[-1]["version"]
+    return {"version": version, "resync": False, "changes": changes}
+
+@app.get("/dashboard/summary")
+def get_dashboard_summary():
+    """Running dashboard totals; answered from counters, never by scanning."""
+    return dashboard_summary()
+
+@app.get("/reports/stock")
+def get_stock_report():
+    """Totals over the chat inventory: item count, stock value, low stock, quantity per unit."""
+    return stock_report()
+
+@app.get("/reports/low-stock")
+def get_low_stock(limit: int = Query(20, ge=1, le=1000), include_healthy: bool = False):
+    """
+    Lists chat inventory items below their reorder threshold, most depleted
+    first. With include_healthy, returns the top items by depletion even if
+    they are above their threshold.
+    """
+    return most_depleted(limit, low_stock_only=not include_healthy)
+
+@app.get("/reports/parser")
+def get_parser_report():
+    """How chat commands were parsed: by the rules, from the cache, by joining an identical call, or by the LLM."""
+    return {
+        "rules": agent_sessions.rule_parser.stats(),
+        "cache": parse_cache.stats(),
+        "coalescing": parse_flights.stats(),
+        "llm": async_command_parser.stats(),
+    }
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Returns once the client that sent a request has gone away."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+@app.post("/text-command")
+async def text_command(command: TextCommand, request: Request):
+    """
+    Runs a chat command. Parsing runs on the event loop, so slow LLM calls do
+    not hold worker threads; if the client disconnects first, the parse is
+    cancelled and nothing is queued for confirmation.
+
+    Confirmations are tracked per session_id, so a "yes" from one client
+    never confirms a command sent by another.
+    """
+    session_id = command.session_id or (request.client.host if request.client else "")
+    agent = agent_sessions.get(session_id)
+    task = asyncio.ensure_future(agent.process_command_async(command.command))
+    disconnect = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait({task, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        task.cancel()  # No-op once the command has finished
+    if task not in done:
+        return Response(status_code=499)  # Client closed request
+    return task.result()
+
+@app.get("/items/{item_id}", response_model=Item)
+def get_item(item_id: int, response: Response):
+    record = inventory.get(item_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = etag(record["version"])
+    return record
+
+@app.get("/items/{item_id}/stock")
+def get_item_stock(item_id: int):
+    """Looks up the chat inventory's stock of an item by its SKU id."""
+    name = catalog.name_of(item_id)
+    stock = get_stock(name) if name is not None else None
+    if stock is None:
+        raise HTTPException(status_code=404, detail="Item not in stock")
+    return stock
+
+@app.put("/items/{item_id}/stock/threshold")
+def update_item_threshold(item_id: int, body: Threshold):
+    """Sets the chat inventory's reorder threshold for an item."""
+    name = catalog.name_of(item_id)
+    result = set_threshold(name, body.threshold) if name is not None else None
+    if result is None or not result["success"]:
+        raise HTTPException(status_code=404, detail="Item not in stock")
+    return result["item"]
 
 @app.post("/items")
-def add_item(item: Item):
-    inventory.append(item.dict())
-    return {"message": "Item added"}
+def add_item(item: Item, response: Response):
+    fields = item.dict()
+    if not bind_id(fields, create=True):
+        raise HTTPException(status_code=409, detail="Item name is registered under another id")
+    record = inventory.create(fields)
+    if record is None:
+        raise HTTPException(status_code=409, detail="Item already exists")
+    response.headers["ETag"] = etag(record["version"])
+    return {"message": "Item added", "id": record["id"]}
 
 @app.put("/items/{item_id}")
-def update_item(item_id: int, item: Item):
-    for i in range(len(inventory)):
-        if inventory[i]["id"] == item_id:
-            inventory[i] = item.dict()
-            return {"message": "Item updated"}
-    return {"error": "Item not found"}
+def update_item(item_id: int, item: Item, response: Response, if_match: Optional[str] = Header(None)):
+    if item.id not in (None, item_id):
+        raise HTTPException(status_code=400, detail="Item id does not match the URL")
+    fields = {**item.dict(), "id": item_id}
+    if not bind_id(fields, create=False):
+        raise HTTPException(status_code=409, detail="Items cannot be renamed; the name belongs to another id")
+    try:
+        record = inventory.replace(item_id, fields, expected_version(if_match))
+    except VersionConflict:
+        raise HTTPException(status_code=412, detail="Item was modified by another request")
+    if record is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = etag(record["version"])
+    return {"message": "Item updated"}
 
 @app.delete("/items/{item_id}")
-def delete_item(item_id: int):
-    global inventory
-    inventory = [item for item in inventory if item["id"] != item_id]
-    return {"message": "Item deleted"}
\ No newline at end of file
+def delete_item(item_id: int, if_match: Optional[str] = Header(None)):
+    try:
+        deleted = inventory.delete(item_id, expected_version(if_match))
+    except VersionConflict:
+        raise HTTPException(status_code=412, detail="Item was modified by another request")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"message": "Item deleted"}
+
+@app.websocket("/ws/inventory")
+async def inventory_socket(websocket: WebSocket):
+    """Pushes {"changes": [...]} messages to a dashboard as items change."""
+    await websocket.accept()
+    subscription = broadcaster.subscribe()
+    # Keep a receive pending so a client disconnect is noticed while idle
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            changes = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({receiver, changes}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done() and receiver.result()["type"] == "websocket.disconnect":
+                changes.cancel()
+                break
+            # Both may finish in the same wait; changes already taken from the
+            # subscription must be sent, not dropped
+            if changes.done():
+                await websocket.send_json({"changes": changes.result()})
+            else:
+                changes.cancel()
+            if receiver.done():
+                receiver = asyncio.ensure_future(websocket.receive())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        broadcaster.unsubscribe(subscription)
+
+@app.get("/events/inventory")
+async def inventory_events(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events fallback for /ws/inventory.
+
+    Each change is sent as one event whose id is its change version. A
+    reconnecting client that sends Last-Event-ID first receives whatever it
+    missed, if the change log still holds it.
+    """
+    def event(change: dict) -> str:
+        return f"id: {change['version']}\ndata: {json.dumps(change, separators=(',', ':'))}\n\n"
+
+    async def stream():
+        subscription = broadcaster.subscribe()
+        try:
+            seen = 0
+            if last_event_id is not None and last_event_id.isdigit():
+                missed = change_log.since(int(last_event_id))
+                if missed is None:
+                    yield "event: resync\ndata: {}\n\n"
+                elif missed:
+                    seen = missed[-1]["version"]
+                    yield "".join(event(change) for change in missed)
+            while True:
+                try:
+                    changes = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                # Skip changes already replayed from the change log
+                yield "".join(event(change) for change in changes if change["version"] > seen)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
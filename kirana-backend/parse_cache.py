@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import time
+import atexit
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from rule_parser import parse_number_words
+from single_flight import SingleFlight
+
+# Only marks that never change what a command means are dropped. The rest
+# stay, so "1/2 kg" and "1 2 kg" or "rice & dal" and "rice dal" get
+# different keys; "&" and "+" join items just like "and" in rule_parser.
+_PUNCTUATION = re.compile(r"\.(?!\d)|[!?\"()\[\]{}*`~]")
+_CONJUNCTIONS = re.compile(r"[&+]")
+
+
+def normalize_command(command: str) -> str:
+    """
+    Canonical form of a command used as its cache key.
+
+    Case, sentence punctuation and runs of whitespace are ignored, "&" and
+    "+" become "and" and numbers written as words become digits, so
+    "Add five kg  Rice!" and "add 5 kg rice" share one entry, as do
+    "five hundred grams" and "500 grams".
+
+    Args:
+        command (str): The command as typed by a user.
+
+    Returns:
+        str: The normalized command.
+    """
+    text = _CONJUNCTIONS.sub(" and ", _PUNCTUATION.sub(" ", command.casefold()))
+    words = text.replace(";", ",").replace(",", " , ").split()
+    normalized: List[str] = []
+    i = 0
+    while i < len(words):
+        number = parse_number_words(words, i)
+        if number is None:
+            normalized.append(words[i])
+            i += 1
+        else:
+            normalized.append(str(number[0]))
+            i = number[1]
+    return " ".join(normalized)
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parsed commands with a time-to-live.
+
+    Entries are kept as JSON so every hit hands out fresh dicts that callers
+    may modify. With a database path, entries are also written to SQLite and
+    survive restarts; a command missing from memory is looked up there before
+    it counts as a miss. The database has its own lock, so memory hits never
+    wait on disk, and get_async()/put_async() run the SQLite calls on the
+    event loop's executor.
+    """
+
+    _UPSERT_SQL = "INSERT OR REPLACE INTO parse_cache (key, parsed, expires_at) VALUES (?, ?, ?)"
+    _SELECT_SQL = "SELECT parsed, expires_at FROM parse_cache WHERE key = ? AND expires_at > ?"
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Entries kept in memory before the least recently used is evicted.
+            ttl (float): Seconds an entry stays valid.
+            path (Optional[str]): SQLite database for the on-disk tier, or None to keep memory only.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0  # Hits served from the on-disk tier (included in hits)
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache "
+                "(key TEXT PRIMARY KEY, parsed TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM parse_cache WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Looks up the parse of a command.
+
+        Args:
+            key (str): The command as normalized by normalize_command().
+
+        Returns:
+            Optional[Any]: The parsed command(s), or None on a miss or expired entry.
+        """
+        now = time.time()
+        entry = self._lookup(key, now)
+        if entry is None and self._conn is not None:
+            entry = self._read_disk(key, now)
+        return self._result(key, entry)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Same as get(), without blocking the event loop on the on-disk tier."""
+        now = time.time()
+        entry = self._lookup(key, now)
+        if entry is None and self._conn is not None:
+            entry = await asyncio.get_running_loop().run_in_executor(None, self._read_disk, key, now)
+        return self._result(key, entry)
+
+    def put(self, key: str, parsed: Any) -> None:
+        """
+        Stores the parse of a command.
+
+        Args:
+            key (str): The command as normalized by normalize_command().
+            parsed (Any): The parsed command(s); must be JSON serializable.
+        """
+        entry = self._remember(key, parsed)
+        if self._conn is not None:
+            self._write_disk(key, entry)
+
+    async def put_async(self, key: str, parsed: Any) -> None:
+        """Same as put(), without blocking the event loop on the on-disk tier."""
+        entry = self._remember(key, parsed)
+        if self._conn is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, entry)
+
+    def _lookup(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        """Returns the in-memory entry for key, dropping it if it expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        """Returns the on-disk entry for key and brings it into memory."""
+        with self._conn_lock:
+            row = self._conn.execute(self._SELECT_SQL, (key, now)).fetchone() if self._conn is not None else None
+        if row is None:
+            return None
+        entry = (row[1], row[0])
+        with self._lock:
+            self._store(key, entry)
+            self.disk_hits += 1
+        return entry
+
+    def _result(self, key: str, entry: Optional[Tuple[float, str]]) -> Optional[Any]:
+        """Counts a lookup and decodes the entry it found, if any."""
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[1])
+
+    def _remember(self, key: str, parsed: Any) -> Tuple[float, str]:
+        """Stores a new entry in memory and returns it."""
+        entry = (time.time() + self.ttl, json.dumps(parsed))
+        with self._lock:
+            self._store(key, entry)
+        return entry
+
+    def _write_disk(self, key: str, entry: Tuple[float, str]) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.execute(self._UPSERT_SQL, (key, entry[1], entry[0]))
+
+    def _store(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports cache effectiveness.
+
+        Returns:
+            Dict[str, int]: Hit, on-disk hit and miss counters and the current in-memory size.
+        """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def close(self) -> None:
+        """Closes the on-disk tier."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+parse_cache = ParseCache(
+    max_entries=int(os.getenv("KIRANA_PARSE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("KIRANA_PARSE_CACHE_TTL", "86400")),
+    path=os.getenv("KIRANA_PARSE_CACHE_PATH") or None,
+)
+atexit.register(parse_cache.close)
+
+# Coalesces concurrent LLM parses of the same normalized command
+parse_flights = SingleFlight()
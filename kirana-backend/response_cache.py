@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized responses tagged with a data version.
+
+    An entry is only served while the version it was rendered at is still
+    current, so bumping the version on every write invalidates the whole
+    cache without having to track which entries a write affected.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """
+        Looks up a response rendered at the given version.
+
+        Args:
+            key (Hashable): Identifies the request, e.g. its query parameters.
+            version (int): The current data version.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or stale entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        """
+        Stores a response rendered at the given version.
+
+        Args:
+            key (Hashable): Identifies the request.
+            version (int): The data version the value was rendered from.
+            value (Any): The rendered response.
+        """
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports cache effectiveness.
+
+        Returns:
+            Dict[str, int]: Hit and miss counters and the current size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
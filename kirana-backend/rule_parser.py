@@ -0,0 +1,343 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import units
+
+ADD_VERBS = {"add", "put", "stock", "restock", "receive", "received", "got", "bought", "purchase", "purchased"}
+UPDATE_VERBS = {"update", "set", "change", "make"}
+DELETE_VERBS = {"delete", "remove", "drop", "discard"}
+LIST_VERBS = {"list", "show", "display", "view", "check"}
+
+# Words allowed after a list verb, e.g. "show me all the low stock items"
+LIST_WORDS = {"me", "all", "the", "my", "current", "whole", "inventory", "items", "stock", "products", "everything"}
+LOW_STOCK_WORDS = {"low", "low-stock", "running", "out", "short"}
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100, "thousand": 1000, "half": 0.5,
+}
+TENS = {"twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"}
+MULTIPLIERS = {"hundred", "thousand"}
+
+# Fields an update can target besides the quantity, e.g. "set price of rice
+# to 50"; the grammar only updates quantities, so these go to the LLM
+OTHER_FIELDS = {"price", "cost", "rate", "mrp", "discount", "threshold", "reorder", "unit", "units", "name"}
+
+ARTICLES = {"the", "some", "a", "an", "my"}
+# Trailing phrases naming where the item goes, e.g. "to the inventory"
+PLACE_PREPOSITIONS = {"to", "into", "in", "from", "of"}
+PLACES = {"inventory", "stock", "store", "shop", "list"}
+# Any other phrase starting with these says where or how the item goes
+# ("in the fridge", "for diwali"), which the grammar cannot act on
+PREPOSITIONS = {"to", "into", "in", "inside", "from", "on", "onto", "at", "for", "with", "by", "under", "near"}
+
+# Containers that are not registered units; "3 bag rice" names neither a
+# unit nor an item the grammar can trust ("3 bags of rice" is accepted)
+CONTAINERS = {
+    "bag", "sack", "packet", "pack", "pouch", "box", "carton", "crate", "tray", "bottle",
+    "jar", "can", "tin", "bundle", "bunch", "bucket", "drum", "roll", "strip", "cup",
+}
+CONTAINERS |= {word + ("es" if word.endswith(("x", "ch")) else "s") for word in CONTAINERS}
+
+# Item names the grammar accepts; anything else goes to the LLM
+ITEM_PATTERN = re.compile(r"^[a-z][a-z'-]*(?: [a-z][a-z'-]*){0,4}$")
+
+CLAUSE_SEPARATORS = re.compile(r"\b(?:and then|and|then|also|plus)\b")
+NUMBER_PATTERN = re.compile(r"^\d+(?:\.\d+)?$")
+
+Command = Dict[str, Any]
+
+
+class RuleBasedParser:
+    """
+    Deterministic parser for common inventory commands.
+
+    It understands add/update/delete/list commands with numbers (digits or
+    words), units from the unit registry and several commands joined by
+    "and", commas or "then". It produces the same dicts as
+    CommandParserAgent.parse_command, and returns None for anything it is
+    not sure about so the LLM can handle it instead.
+    """
+
+    def __init__(self):
+        self.matched = 0   # Commands parsed by the rules
+        self.deferred = 0  # Commands left to the LLM
+
+    def parse(self, command: str) -> Optional[Union[Command, List[Command]]]:
+        """
+        Parses a command.
+
+        Args:
+            command (str): The user's natural language command.
+
+        Returns:
+            Optional[Union[Command, List[Command]]]: A command dict with
+                "operation", "item", "quantity" and "unit type", a list of
+                them for several commands, or None if the grammar does not
+                cover the command.
+        """
+        parsed = self._parse(command)
+        if parsed is None:
+            self.deferred += 1
+        else:
+            self.matched += 1
+        return parsed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports how much traffic the rules handle.
+
+        Returns:
+            Dict[str, int]: Matched and deferred command counts.
+        """
+        return {"matched": self.matched, "deferred": self.deferred}
+
+    def _parse(self, command: str) -> Optional[Union[Command, List[Command]]]:
+        text = command.lower().replace("&", " and ")
+        text = re.sub(r"[,;]", " and ", text)
+        text = re.sub(r"\.(?!\d)|[^a-z0-9.' -]", " ", text)
+        clauses = [clause.split() for clause in CLAUSE_SEPARATORS.split(text)]
+        clauses = [clause for clause in clauses if clause]
+        if not clauses:
+            return None
+
+        commands: List[Command] = []
+        operation = None
+        for words in clauses:
+            parsed = _parse_clause(words, operation)
+            if parsed is None:
+                return None
+            operation = parsed["operation"]
+            commands.append(parsed)
+        return commands[0] if len(commands) == 1 else commands
+
+
+def _parse_clause(words: List[str], previous: Optional[str]) -> Optional[Command]:
+    """Parses one clause; a clause without a verb repeats the previous operation."""
+    verb = words[0]
+    if verb in LIST_VERBS or (verb == "what's" and previous is None):
+        return _parse_list(words[1:])
+    if verb in ADD_VERBS:
+        return _parse_add(words[1:])
+    if verb in UPDATE_VERBS:
+        return _parse_update(words[1:])
+    if verb in DELETE_VERBS:
+        return _parse_delete(words[1:])
+    if previous == "add":
+        return _parse_add(words)
+    if previous == "update":
+        return _parse_update(words)
+    if previous == "delete":
+        return _parse_delete(words)
+    return None
+
+
+def _parse_list(words: List[str]) -> Optional[Command]:
+    low_stock = any(word in LOW_STOCK_WORDS for word in words)
+    for word in words:
+        if word not in LIST_WORDS and word not in LOW_STOCK_WORDS and word not in {"on", "of", "in"}:
+            return None
+    command: Command = {"operation": "list"}
+    if low_stock:
+        command["low_stock"] = True
+    return command
+
+
+def _parse_add(words: List[str]) -> Optional[Command]:
+    # "add 5 kg of rice"
+    amount = _parse_amount(words, 0)
+    if amount is not None:
+        quantity, unit, end = amount
+        item = _parse_item(words[end:])
+    else:
+        # "add rice 5 kg"
+        start = next((i for i, word in enumerate(words) if _parse_number(words, i) is not None), None)
+        if start is None:
+            return None
+        amount = _parse_amount(words, start)
+        if amount is None or amount[2] != len(words):
+            return None
+        quantity, unit, _ = amount
+        item = _parse_item(words[:start])
+    if item is None:
+        return None
+    return _command("add", item, quantity, unit)
+
+
+def _parse_update(words: List[str]) -> Optional[Command]:
+    # "update rice to 5 kg", "set the quantity of rice to 5"
+    if "to" not in words:
+        return None
+    split = len(words) - 1 - words[::-1].index("to")
+    target = words[:split]
+    if any(word in OTHER_FIELDS for word in target):
+        return None
+    if len(target) > 2 and target[-2:] in (["quantity", "of"], ["stock", "of"]):
+        return None
+    if target[:1] in (["quantity"], ["stock"], ["count"]) and target[1:2] == ["of"]:
+        target = target[2:]
+    elif target[:3] in (["the", "quantity", "of"], ["the", "stock", "of"], ["the", "count", "of"]):
+        target = target[3:]
+    elif target[-1:] in (["quantity"], ["stock"], ["count"]):
+        target = target[:-1]
+    item = _parse_item(target)
+    amount = _parse_amount(words, split + 1)
+    if item is None or amount is None or amount[2] != len(words):
+        return None
+    quantity, unit, _ = amount
+    return _command("update", item, quantity, unit)
+
+
+def _parse_delete(words: List[str]) -> Optional[Command]:
+    # A quantity ("remove 2 kg rice") means something else; leave it to the LLM
+    if any(_parse_number(words, i) is not None for i in range(len(words))):
+        return None
+    item = _parse_item(words)
+    if item is None:
+        return None
+    return {"operation": "delete", "item": item}
+
+
+def _command(operation: str, item: str, quantity: float, unit: Optional[str]) -> Command:
+    command: Command = {"operation": operation, "item": item, "quantity": quantity}
+    if unit is not None:
+        command["unit type"] = unit
+    return command
+
+
+def _parse_item(words: List[str]) -> Optional[str]:
+    """
+    Strips articles and "to the inventory" from an item name and validates
+    it. Names starting with an unregistered unit or holding any other
+    prepositional phrase are rejected.
+    """
+    if words[:1] == ["of"]:
+        words = words[1:]
+    while words and words[0] in ARTICLES:
+        words = words[1:]
+    for length in (3, 2):
+        tail = words[-length:]
+        if len(words) > length and tail[0] in PLACE_PREPOSITIONS and tail[-1] in PLACES:
+            if length == 2 or tail[1] in ARTICLES:
+                words = words[:-length]
+                break
+    item = " ".join(words)
+    # A leading number word is a quantity the grammar did not understand
+    if not ITEM_PATTERN.match(item) or words[0] in PLACE_PREPOSITIONS or words[0] in NUMBER_WORDS:
+        return None
+    if words[0] in CONTAINERS or any(word in PREPOSITIONS for word in words[1:]):
+        return None
+    return item
+
+
+def _parse_amount(words: List[str], start: int) -> Optional[Tuple[float, Optional[str], int]]:
+    """
+    Parses "QUANTITY [UNIT] [of]" at words[start].
+
+    Returns:
+        Optional[Tuple[float, Optional[str], int]]: The quantity, the unit
+            (None if not given) and the index after the amount.
+    """
+    number = _parse_number(words, start)
+    if number is None:
+        # "a dozen eggs", "half kg of sugar"
+        if start < len(words) and words[start] in ("a", "an"):
+            number = (1, start + 1)
+        else:
+            return None
+    quantity, i = number
+    if words[i:i + 1] in (["a"], ["an"]) and quantity == 0.5:
+        i += 1  # "half a kg"
+
+    unit = None
+    for length in (3, 2, 1):
+        found = units.find(" ".join(words[i:i + length])) if i + length <= len(words) else None
+        if found is not None:
+            unit = found.name
+            i += length
+            break
+    else:
+        # An unregistered unit is only accepted in "3 bags of rice"
+        if i + 2 < len(words) and words[i + 1] == "of" and NUMBER_PATTERN.match(words[i]) is None:
+            unit = words[i]
+            i += 1
+        elif quantity != int(quantity) or words[start] in ("a", "an"):
+            return None
+    if words[i:i + 1] == ["of"]:
+        i += 1
+    return quantity, unit, i
+
+
+def _parse_number(words: List[str], start: int) -> Optional[Tuple[float, int]]:
+    """Parses a number in digits or words at words[start]."""
+    if start >= len(words):
+        return None
+    word = words[start]
+    if NUMBER_PATTERN.match(word):
+        value = float(word)
+        return (int(value) if value.is_integer() else value), start + 1
+    return parse_number_words(words, start)
+
+
+def parse_number_words(words: List[str], start: int) -> Optional[Tuple[float, int]]:
+    """
+    Parses a number written in words at words[start].
+
+    Handles "half", numbers below a hundred ("twenty five") and hundreds and
+    thousands built from them ("five hundred", "fifteen hundred", "two
+    thousand three hundred fifty").
+
+    Args:
+        words (List[str]): The words of a command.
+        start (int): Where the number starts.
+
+    Returns:
+        Optional[Tuple[float, int]]: The number and the index after it, or
+            None if words[start] is not a number word.
+    """
+    if words[start:start + 1] == ["half"]:
+        return 0.5, start + 1
+    group = _parse_group(words, start)
+    if group is None:
+        if words[start:start + 1] != ["thousand"]:
+            return None
+        group = (1, start)  # "thousand" alone
+    value, i = group
+    if words[i:i + 1] == ["thousand"]:
+        value *= 1000
+        rest = _parse_group(words, i + 1)
+        i += 1
+        if rest is not None:
+            value += rest[0]
+            i = rest[1]
+    return value, i
+
+
+def _parse_group(words: List[str], start: int) -> Optional[Tuple[int, int]]:
+    """Parses "[N] [hundred [N]]" with N below a hundred, e.g. "two hundred ten"."""
+    below = _parse_below_hundred(words, start)
+    value, i = below if below is not None else (None, start)
+    if words[i:i + 1] == ["hundred"]:
+        value = (1 if value is None else value) * 100
+        rest = _parse_below_hundred(words, i + 1)
+        i += 1
+        if rest is not None:
+            value += rest[0]
+            i = rest[1]
+    return None if value is None else (value, i)
+
+
+def _parse_below_hundred(words: List[str], start: int) -> Optional[Tuple[int, int]]:
+    """Parses a number below a hundred written in words, e.g. "twenty five"."""
+    word = words[start] if start < len(words) else None
+    if word not in NUMBER_WORDS or word in MULTIPLIERS or word == "half":
+        return None
+    value = NUMBER_WORDS[word]
+    i = start + 1
+    if word in TENS and i < len(words) and NUMBER_WORDS.get(words[i]) in range(1, 10):
+        value += NUMBER_WORDS[words[i]]
+        i += 1
+    return value, i
@@ -0,0 +1,112 @@
+import copy
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait on its future and receive a deep copy of its result (or
+    its exception) instead of making the call again. do_async() does the
+    same for coroutines on an event loop.
+    """
+
+    def __init__(self):
+        self.calls = 0      # Calls actually made
+        self.coalesced = 0  # Calls saved by joining one in flight
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        # key -> [task, callers awaiting it], for do_async()
+        self._tasks: Dict[Hashable, List[Any]] = {}
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """
+        Runs call() unless a call for the same key is already in flight.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            call (Callable[[], Any]): Produces the result.
+
+        Returns:
+            Any: The result of this call or of the one in flight.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = call()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def do_async(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits call() unless a call for the same key is already in flight.
+
+        The call runs in its own task. A caller that is cancelled stops
+        waiting without disturbing the others; the call itself is cancelled
+        once no caller is waiting for it.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            call (Callable[[], Awaitable[Any]]): Produces the result.
+
+        Returns:
+            Any: The result of this call or of the one in flight.
+        """
+        flight = self._tasks.get(key)
+        leader = flight is None
+        with self._lock:
+            if leader:
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            flight = self._tasks[key] = [asyncio.ensure_future(call()), 0]
+            flight[0].add_done_callback(lambda _: self._forget(key, flight))
+        task = flight[0]
+        flight[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                flight[1] -= 1
+                if flight[1] == 0:
+                    # Later callers must start a new call, not join this one
+                    self._forget(key, flight)
+                    task.cancel()
+            raise
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: List[Any]) -> None:
+        if self._tasks.get(key) is flight:
+            del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports how many calls coalescing saved.
+
+        Returns:
+            Dict[str, int]: Calls made, calls saved and calls currently in flight.
+        """
+        in_flight = len(self._in_flight) + len(self._tasks)
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": in_flight}
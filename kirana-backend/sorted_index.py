@@ -0,0 +1,163 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # build() sorts with plain Python instead
+    np = None
+
+
+class SortedIndex:
+    """
+    Ordered set of (key, id) integer pairs, e.g. stock level -> SKU id.
+
+    Pairs are kept in buckets of parallel typed arrays (8 bytes per key and
+    per id, instead of a tuple per pair), ordered by key and then id. A
+    binary search over the bucket maxima finds the bucket of a pair and a
+    second one finds its slot, so add() and remove() cost O(log n) plus a
+    shift within one bucket of at most 2 * load pairs. Positional reads
+    step over whole buckets, costing O(n / load + k) for k results.
+
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, load: int = 1000):
+        """
+        Initialize an empty index.
+
+        Args:
+            load (int): Target bucket size; a bucket is split in two once it
+                grows past twice this size.
+        """
+        self.load = load
+        self._len = 0
+        self._keys: List[array] = []
+        self._ids: List[array] = []
+        # Largest (key, id) of each bucket, for the search across buckets
+        self._maxes: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return self._len
+
+    def build(self, keys: Iterable[int], ids: Iterable[int]) -> None:
+        """
+        Replaces the contents with the given pairs, sorting them once.
+
+        Args:
+            keys (Iterable[int]): The key of each pair.
+            ids (Iterable[int]): The id of each pair, in the same order.
+        """
+        if np is not None:
+            keys = np.asarray(keys, dtype=np.int64)
+            ids = np.asarray(ids, dtype=np.int64)
+            order = np.lexsort((ids, keys))
+            keys = array("q", keys[order].tobytes())
+            ids = array("q", ids[order].tobytes())
+        else:
+            pairs = sorted(zip(keys, ids))
+            keys = array("q", [key for key, _ in pairs])
+            ids = array("q", [id_ for _, id_ in pairs])
+        self._len = len(keys)
+        self._keys = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._ids = [ids[i:i + self.load] for i in range(0, len(ids), self.load)]
+        self._maxes = [(bucket_keys[-1], bucket_ids[-1]) for bucket_keys, bucket_ids in zip(self._keys, self._ids)]
+
+    def add(self, key: int, id_: int) -> None:
+        """
+        Inserts a pair.
+
+        Args:
+            key (int): The sort key.
+            id_ (int): The id, which orders pairs with equal keys.
+        """
+        if not self._maxes:
+            self._keys.append(array("q", [key]))
+            self._ids.append(array("q", [id_]))
+            self._maxes.append((key, id_))
+            self._len = 1
+            return
+        # Past the last bucket's maximum, the pair goes at the end of it
+        i = min(bisect_left(self._maxes, (key, id_)), len(self._maxes) - 1)
+        keys, ids = self._keys[i], self._ids[i]
+        j = self._position(keys, ids, key, id_)
+        keys.insert(j, key)
+        ids.insert(j, id_)
+        self._maxes[i] = (keys[-1], ids[-1])
+        self._len += 1
+        if len(keys) > 2 * self.load:
+            half = len(keys) // 2
+            self._keys[i:i + 1] = [keys[:half], keys[half:]]
+            self._ids[i:i + 1] = [ids[:half], ids[half:]]
+            self._maxes[i:i + 1] = [(keys[half - 1], ids[half - 1]), (keys[-1], ids[-1])]
+
+    def remove(self, key: int, id_: int) -> None:
+        """
+        Removes a pair.
+
+        Args:
+            key (int): The key it was added with.
+            id_ (int): The id it was added with.
+
+        Raises:
+            KeyError: If the pair is not in the index.
+        """
+        i = bisect_left(self._maxes, (key, id_))
+        if i < len(self._maxes):
+            keys, ids = self._keys[i], self._ids[i]
+            j = self._position(keys, ids, key, id_)
+            if j < len(keys) and keys[j] == key and ids[j] == id_:
+                del keys[j]
+                del ids[j]
+                self._len -= 1
+                if keys:
+                    self._maxes[i] = (keys[-1], ids[-1])
+                else:
+                    del self._keys[i], self._ids[i], self._maxes[i]
+                return
+        raise KeyError((key, id_))
+
+    def count_below(self, key: int) -> int:
+        """
+        Counts the pairs whose key is less than the given one.
+
+        Args:
+            key (int): The bound, exclusive.
+
+        Returns:
+            int: The number of such pairs, which is also the position of the
+                first pair with a key of at least key.
+        """
+        i = bisect_left(self._maxes, (key,))
+        count = sum(len(keys) for keys in self._keys[:i])
+        if i < len(self._keys):
+            count += bisect_left(self._keys[i], key)
+        return count
+
+    def ids(self, start: int, stop: int) -> array:
+        """
+        Returns the ids at positions [start, stop) in key order.
+
+        Args:
+            start (int): First position.
+            stop (int): Position after the last one.
+
+        Returns:
+            array: The ids, as a typed array.
+        """
+        found = array("q")
+        position = 0
+        for ids in self._ids:
+            if position >= stop:
+                break
+            if position + len(ids) > start:
+                found += ids[max(start - position, 0):stop - position]
+            position += len(ids)
+        return found
+
+    @staticmethod
+    def _position(keys: array, ids: array, key: int, id_: int) -> int:
+        """Returns where (key, id_) belongs in one bucket."""
+        lo = bisect_left(keys, key)
+        hi = bisect_right(keys, key, lo)
+        return bisect_left(ids, id_, lo, hi)
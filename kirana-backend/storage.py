@@ -0,0 +1,566 @@
+import os
+import ast
+import logging
+import sqlite3
+import threading
+import atexit
+import marshal
+import struct
+import zlib
+from itertools import compress
+from operator import itemgetter
+from typing import Dict, Any, Optional, Tuple, List
+
+logger = logging.getLogger(__name__)
+
+# Columns persisted for every inventory record, in storage order. Columns
+# added after the first release need a DEFAULT so existing tables migrate.
+COLUMNS = {
+    "name": "TEXT PRIMARY KEY",
+    "unit": "TEXT NOT NULL",
+    "price": "REAL NOT NULL",
+    "quantity": "REAL NOT NULL",
+    "created_at": "REAL NOT NULL",
+    "updated_at": "REAL NOT NULL",
+    "version": "INTEGER NOT NULL DEFAULT 0",
+    "sku": "INTEGER NOT NULL DEFAULT 0",
+    "threshold": "REAL NOT NULL DEFAULT 5",
+}
+FIELDS = tuple(COLUMNS)
+
+# Value of each column in rows written before the column existed
+DEFAULTS = tuple(
+    ast.literal_eval(definition.split(" DEFAULT ")[1]) if " DEFAULT " in definition else None
+    for definition in COLUMNS.values()
+)
+
+# Persisted records in column form: one list per entry in FIELDS, with the
+# record at row i made of the i-th value of every list
+Columns = List[List[Any]]
+
+
+def empty_columns() -> Columns:
+    """Returns columns holding no records."""
+    return [[] for _ in FIELDS]
+
+
+# High-water marks of deleted records: the highest version stamped on a
+# delete and the highest SKU id a deleted record had. Only ever raised, so
+# versions and ids are not handed out again once their records are gone.
+Marks = Dict[str, int]
+MARKS = ("deleted_version", "deleted_sku")
+
+
+def no_marks() -> Marks:
+    """Returns the marks of a store that never deleted anything."""
+    return dict.fromkeys(MARKS, 0)
+
+
+def raise_marks(marks: Marks, other: Marks) -> None:
+    """Raises each of marks to the matching value of other, if higher."""
+    for key, value in other.items():
+        if value > marks.get(key, 0):
+            marks[key] = value
+
+
+class StorageBackend:
+    """Interface implemented by every inventory persistence backend."""
+
+    def load(self) -> Tuple[Columns, Marks]:
+        """
+        Loads every persisted record.
+
+        Records come back column-wise, so millions of them cost a handful of
+        lists rather than a dict per record, and callers can fill their own
+        arrays in bulk.
+
+        Returns:
+            Tuple[Columns, Marks]: One list per entry in FIELDS, holding one
+                value per record, and the highest version and SKU id passed
+                to delete(), under each key of MARKS (0 if none). Fields
+                missing from records written by an older release are filled
+                in from DEFAULTS.
+        """
+        raise NotImplementedError
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """
+        Inserts or replaces a record.
+
+        Args:
+            record (Dict[str, Any]): Record with one value per entry in FIELDS.
+        """
+        raise NotImplementedError
+
+    def delete(self, name: str, version: int, sku: int) -> None:
+        """
+        Removes the record for an item.
+
+        Args:
+            name (str): The name of the item.
+            version (int): The version stamped on the deletion. The highest
+                one is kept, so versions can keep growing across restarts
+                even when the most recent writes were deletes.
+            sku (int): The SKU id the item had. The highest one is kept, so
+                the id is not given to another name after a restart.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Makes every accepted write durable."""
+
+    def close(self) -> None:
+        """Flushes pending writes and releases resources."""
+        self.flush()
+
+
+class MemoryStorage(StorageBackend):
+    """Non-durable backend; inventory lives only as long as the process."""
+
+    def load(self) -> Tuple[Columns, Marks]:
+        return empty_columns(), no_marks()
+
+    def put(self, record: Dict[str, Any]) -> None:
+        pass
+
+    def delete(self, name: str, version: int, sku: int) -> None:
+        pass
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Embedded SQLite backend running in WAL mode.
+
+    Writes are queued and committed in batches by a background flusher, so a
+    mutation costs a dict assignment on the request path. Repeated writes to
+    the same item within a batch collapse into a single row update.
+    """
+
+    _UPSERT_SQL = (
+        f"INSERT OR REPLACE INTO inventory ({', '.join(FIELDS)}) "
+        f"VALUES ({', '.join('?' for _ in FIELDS)})"
+    )
+    _DELETE_SQL = "DELETE FROM inventory WHERE name = ?"
+    _SELECT_SQL = f"SELECT {', '.join(FIELDS)} FROM inventory"
+    _MARK_SQL = (
+        "INSERT INTO inventory_meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = max(value, excluded.value)"
+    )
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.05):
+        """
+        Opens (or creates) the database and starts the flusher thread.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            batch_size (int): Pending writes that trigger an immediate commit.
+            flush_interval (float): Maximum seconds a write waits before commit.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,  # Transactions are managed explicitly
+            cached_statements=16,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inventory ("
+            + ", ".join(f"{name} {definition}" for name, definition in COLUMNS.items())
+            + ")"
+        )
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(inventory)")}
+        for name, definition in COLUMNS.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE inventory ADD COLUMN {name} {definition}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inventory_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+
+        # name -> row to upsert, or None for a pending delete
+        self._pending: Dict[str, Optional[Tuple]] = {}
+        self._pending_marks = no_marks()  # Marks of the pending deletes
+        self._pending_lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-flusher", daemon=True)
+        self._flusher.start()
+
+    def load(self) -> Tuple[Columns, Marks]:
+        self.flush()
+        with self._conn_lock:
+            rows = self._conn.execute(self._SELECT_SQL).fetchall()
+            marks = no_marks()
+            raise_marks(marks, dict(self._conn.execute("SELECT key, value FROM inventory_meta")))
+        columns = [list(map(itemgetter(i), rows)) for i in range(len(FIELDS))]
+        return columns, marks
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self._enqueue(record["name"], tuple(record[field] for field in FIELDS))
+
+    def delete(self, name: str, version: int, sku: int) -> None:
+        self._enqueue(name, None, {"deleted_version": version, "deleted_sku": sku})
+
+    def _enqueue(self, name: str, row: Optional[Tuple], marks: Optional[Marks] = None) -> None:
+        with self._pending_lock:
+            self._pending[name] = row
+            if marks:
+                raise_marks(self._pending_marks, marks)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            marks, self._pending_marks = self._pending_marks, no_marks()
+
+        upserts = [row for row in pending.values() if row is not None]
+        deletes = [(name,) for name, row in pending.items() if row is None]
+        try:
+            with self._conn_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    if upserts:
+                        self._conn.executemany(self._UPSERT_SQL, upserts)
+                    if deletes:
+                        self._conn.executemany(self._DELETE_SQL, deletes)
+                    self._conn.executemany(self._MARK_SQL, [(key, value) for key, value in marks.items() if value])
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except BaseException:
+            # Requeue the batch so the next flush retries it; writes queued
+            # since then are newer and take precedence
+            with self._pending_lock:
+                pending.update(self._pending)
+                self._pending = pending
+                raise_marks(self._pending_marks, marks)
+            raise
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Committing inventory writes failed; retrying")
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+        with self._conn_lock:
+            self._conn.close()
+
+
+class WALStorage(StorageBackend):
+    """
+    Append-only binary write-ahead log with periodic snapshots.
+
+    Each mutation is encoded and appended to an in-memory buffer; a
+    background thread writes and fsyncs the buffer as one group commit, so
+    writers never wait on the disk. A snapshotter periodically seals the
+    active log segment and compacts the previous snapshot plus all sealed
+    segments into a new checkpoint file. Startup loads the checkpoint and
+    replays only the segments written after it.
+
+    Log records are framed as (length, crc32, op) followed by a marshalled
+    payload: the record for a put, (name, version, sku) for a delete. A torn
+    or corrupt record ends replay of its segment.
+    """
+
+    _HEADER = struct.Struct("<IIB")
+    _OP_PUT = 1
+    _OP_DELETE = 2
+    _SNAPSHOT_FILE = "snapshot.bin"
+    _SNAPSHOT_MAGIC = b"KSNAP1"
+
+    def __init__(
+        self,
+        directory: str,
+        group_commit_interval: float = 0.01,
+        group_commit_bytes: int = 1 << 20,
+        snapshot_interval: float = 60.0,
+        snapshot_min_records: int = 10000,
+    ):
+        """
+        Opens the log directory and starts the commit and snapshot threads.
+
+        Args:
+            directory (str): Directory holding the snapshot and log segments.
+            group_commit_interval (float): Maximum seconds a write waits for fsync.
+            group_commit_bytes (int): Buffered bytes that trigger an early commit.
+            snapshot_interval (float): Seconds between snapshot attempts.
+            snapshot_min_records (int): Log records required before compacting.
+        """
+        self.directory = directory
+        self.group_commit_interval = group_commit_interval
+        self.group_commit_bytes = group_commit_bytes
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_min_records = snapshot_min_records
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = bytearray()
+        self._buffer_lock = threading.Lock()
+        # Serializes file writes, fsyncs and segment rotation
+        self._log_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._records_since_snapshot = 0
+        self._commit_wakeup = threading.Event()
+        self._stop = threading.Event()
+
+        # Always start a fresh segment so we never append after a torn tail
+        segments = self._segments()
+        self._segment_seq = (segments[-1] + 1) if segments else 1
+        self._log = open(self._segment_path(self._segment_seq), "ab")
+
+        self._committer = threading.Thread(target=self._commit_loop, name="wal-committer", daemon=True)
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name="wal-snapshotter", daemon=True)
+        self._committer.start()
+        self._snapshotter.start()
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"wal-{seq:012d}.log")
+
+    def _segments(self) -> List[int]:
+        seqs = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith("wal-") and filename.endswith(".log"):
+                seqs.append(int(filename[4:-4]))
+        return sorted(seqs)
+
+    def _read_snapshot(self) -> Tuple[int, Columns, Marks]:
+        """Returns the first segment not covered by the snapshot, its records and marks."""
+        path = os.path.join(self.directory, self._SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return 0, empty_columns(), no_marks()
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(self._SNAPSHOT_MAGIC):
+            raise ValueError(f"Corrupt inventory snapshot: {path}")
+        # Snapshots written before deletes carried a version have no third
+        # entry, and those written before deletes carried a SKU id hold
+        # just the deleted version there
+        next_segment, columns, *stored_marks = marshal.loads(data[len(self._SNAPSHOT_MAGIC):])
+        columns = list(columns) + [[default] * len(columns[0]) for default in DEFAULTS[len(columns):]]
+        marks = no_marks()
+        if stored_marks:
+            stored = stored_marks[0]
+            raise_marks(marks, stored if isinstance(stored, dict) else {"deleted_version": stored})
+        return next_segment, columns, marks
+
+    def _replay(self, seq: int, latest: Dict[str, Optional[Tuple]], marks: Marks) -> None:
+        """
+        Reads every intact record of a log segment into latest, which maps
+        each name to its last put record, or None once it is deleted, and
+        raises marks to the segment's deletes.
+        """
+        with open(self._segment_path(seq), "rb") as f:
+            data = f.read()
+        unpack_from = self._HEADER.unpack_from
+        header_size = self._HEADER.size
+        offset = 0
+        while offset + header_size <= len(data):
+            length, crc, op = unpack_from(data, offset)
+            start = offset + header_size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            value = marshal.loads(payload)
+            if op == self._OP_PUT:
+                latest[value[0]] = value
+            else:
+                # Logs written before deletes carried a version hold just
+                # the name, and those before they carried a SKU id no id
+                name, version, sku = (value + (0, 0))[:3] if isinstance(value, tuple) else (value, 0, 0)
+                if version > marks["deleted_version"]:
+                    marks["deleted_version"] = version
+                if sku > marks["deleted_sku"]:
+                    marks["deleted_sku"] = sku
+                latest[name] = None
+            offset = start + length
+
+    def _load_columns(self, upto: Optional[int] = None) -> Tuple[Columns, Marks]:
+        """Rebuilds state from the snapshot and the log segments before upto."""
+        next_segment, columns, marks = self._read_snapshot()
+        segments = [seq for seq in self._segments() if seq >= next_segment and (upto is None or seq < upto)]
+        latest: Dict[str, Optional[Tuple]] = {}
+        for seq in segments:
+            self._replay(seq, latest, marks)
+        if not latest:
+            return columns, marks
+
+        # Apply only the last record of each name: overwrite or drop the
+        # rows the snapshot already has, and append the rest in one go
+        rows = dict(zip(columns[0], range(len(columns[0]))))
+        keep = bytearray(b"\x01") * len(columns[0])
+        added = []
+        for name, value in latest.items():
+            row = rows.get(name)
+            if value is not None and len(value) < len(FIELDS):
+                value += DEFAULTS[len(value):]
+            if row is None:
+                if value is not None:
+                    added.append(value)
+            elif value is None:
+                keep[row] = 0
+            else:
+                for column, field in zip(columns, value):
+                    column[row] = field
+        if keep.count(0):
+            columns = [list(compress(column, keep)) for column in columns]
+        if added:
+            for i, column in enumerate(columns):
+                column.extend(map(itemgetter(i), added))
+        return columns, marks
+
+    def load(self) -> Tuple[Columns, Marks]:
+        self.flush()
+        return self._load_columns(upto=self._segment_seq)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self._append(self._OP_PUT, tuple(record[field] for field in FIELDS))
+
+    def delete(self, name: str, version: int, sku: int) -> None:
+        self._append(self._OP_DELETE, (name, version, sku))
+
+    def _append(self, op: int, value: Any) -> None:
+        payload = marshal.dumps(value)
+        frame = self._HEADER.pack(len(payload), zlib.crc32(payload), op) + payload
+        with self._buffer_lock:
+            self._buffer += frame
+            self._records_since_snapshot += 1
+            full = len(self._buffer) >= self.group_commit_bytes
+        if full:
+            self._commit_wakeup.set()
+
+    def flush(self) -> None:
+        with self._log_lock:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        """Writes and fsyncs buffered records. Caller must hold _log_lock."""
+        with self._buffer_lock:
+            if not self._buffer:
+                return
+            data, self._buffer = self._buffer, bytearray()
+        try:
+            self._log.write(data)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        except BaseException:
+            # Requeue ahead of records buffered since. The failed write may
+            # have left a torn record, which ends replay of its segment, so
+            # the retry goes to a fresh segment.
+            with self._buffer_lock:
+                self._buffer[:0] = data
+            self._start_segment()
+            raise
+
+    def _start_segment(self) -> None:
+        """Closes the active segment as is and opens the next. Caller must hold _log_lock."""
+        try:
+            self._log.close()
+        except OSError:
+            pass
+        self._segment_seq += 1
+        self._log = open(self._segment_path(self._segment_seq), "ab")
+
+    def _commit_loop(self) -> None:
+        while not self._stop.is_set():
+            self._commit_wakeup.wait(self.group_commit_interval)
+            self._commit_wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing the inventory log failed; retrying")
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            if self._records_since_snapshot >= self.snapshot_min_records:
+                try:
+                    self.snapshot()
+                except Exception:
+                    logger.exception("Inventory snapshot failed; keeping the log")
+
+    def snapshot(self) -> None:
+        """Seals the active segment and compacts sealed segments into a checkpoint."""
+        with self._snapshot_lock:
+            with self._log_lock:
+                self._write_buffer()
+                self._log.close()
+                sealed_upto = self._segment_seq + 1
+                self._segment_seq = sealed_upto
+                self._log = open(self._segment_path(sealed_upto), "ab")
+                with self._buffer_lock:
+                    self._records_since_snapshot = 0
+
+            columns, marks = self._load_columns(upto=sealed_upto)
+            path = os.path.join(self.directory, self._SNAPSHOT_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._SNAPSHOT_MAGIC)
+                marshal.dump((sealed_upto, columns, marks), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            for seq in self._segments():
+                if seq < sealed_upto:
+                    os.remove(self._segment_path(seq))
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._commit_wakeup.set()
+        self._committer.join()
+        self.flush()
+        with self._log_lock:
+            self._log.close()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Builds the backend selected by the KIRANA_STORAGE environment variable.
+
+    Supported values are "sqlite" (default), "wal" and "memory". The SQLite
+    file is read from KIRANA_DB_PATH and the WAL directory from
+    KIRANA_WAL_DIR.
+
+    Returns:
+        StorageBackend: An open storage backend, closed automatically at exit.
+    """
+    kind = os.getenv("KIRANA_STORAGE", "sqlite").lower()
+    if kind == "memory":
+        backend: StorageBackend = MemoryStorage()
+    elif kind == "sqlite":
+        backend = SQLiteStorage(
+            os.getenv("KIRANA_DB_PATH", "kirana.db"),
+            batch_size=int(os.getenv("KIRANA_DB_BATCH_SIZE", "256")),
+            flush_interval=float(os.getenv("KIRANA_DB_FLUSH_INTERVAL", "0.05")),
+        )
+    elif kind == "wal":
+        backend = WALStorage(
+            os.getenv("KIRANA_WAL_DIR", "kirana-wal"),
+            group_commit_interval=float(os.getenv("KIRANA_WAL_COMMIT_INTERVAL", "0.01")),
+            group_commit_bytes=int(os.getenv("KIRANA_WAL_COMMIT_BYTES", str(1 << 20))),
+            snapshot_interval=float(os.getenv("KIRANA_WAL_SNAPSHOT_INTERVAL", "60")),
+            snapshot_min_records=int(os.getenv("KIRANA_WAL_SNAPSHOT_RECORDS", "10000")),
+        )
+    else:
+        raise ValueError(f"Unknown storage backend: {kind}")
+
+    atexit.register(backend.close)
+    return backend
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests run against the in-memory backend so they never touch kirana.db
+os.environ["KIRANA_STORAGE"] = "memory"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from agent import ExecutionAgent
+from async_parser import AsyncCommandParser
+
+
+def stub_parser(handler) -> AsyncCommandParser:
+    """An AsyncCommandParser whose requests are answered by handler instead of the network."""
+    return AsyncCommandParser(
+        base_url="http://llm.test/v1",
+        api_key="test-key",
+        model="stub",
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def completion(reply) -> httpx.Response:
+    """A chat completions response whose message is reply as JSON."""
+    return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(reply)}}]})
+
+
+def parse(parser: AsyncCommandParser, command: str):
+    async def run():
+        try:
+            return await parser.parse_command(command)
+        finally:
+            await parser.aclose()
+    return asyncio.run(run())
+
+
+def test_good_reply():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return completion({"commands": [{"operation": "add", "item": "rice", "quantity": 2, "unit type": "kg"}]})
+
+    parser = stub_parser(handler)
+    assert parse(parser, "daal do kilo chawal") == {"operation": "add", "item": "rice", "quantity": 2, "unit type": "kg"}
+    body = json.loads(requests[0].content)
+    assert requests[0].url.path == "/v1/chat/completions"
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+    assert body["messages"][-1] == {"role": "user", "content": "daal do kilo chawal"}
+    assert parser.stats()["requests"] == 1 and parser.stats()["failures"] == 0
+
+
+@pytest.mark.parametrize("reply", [
+    {"commands": [{"operation": "add", "quantity": 3}]},
+    {"commands": [{"operation": "add", "item": "rice"}]},
+    {"commands": [{"operation": "update", "item": "rice", "quantity": "lots"}]},
+    {"commands": [{"operation": "delete", "item": 7}]},
+    {"commands": [{"item": "rice"}]},
+    {"commands": "add rice"},
+])
+def test_malformed_reply_is_unknown(reply):
+    assert parse(stub_parser(lambda request: completion(reply)), "add rice") == {"operation": "unknown"}
+
+
+def test_malformed_command_in_a_list_is_not_run_or_cached():
+    reply = {"commands": [{"operation": "list"}, {"operation": "add", "quantity": 3}]}
+    parsed = parse(stub_parser(lambda request: completion(reply)), "show stock and add 3")
+    assert parsed == [{"operation": "list"}, {"operation": "unknown"}]
+    assert not ExecutionAgent._cacheable(parsed)
+    assert "Confirm" not in ExecutionAgent()._handle_parsed(parsed)["response"]
+
+
+def test_non_json_reply_is_a_failure():
+    parser = stub_parser(lambda request: httpx.Response(200, json={"choices": [{"message": {"content": "add rice"}}]}))
+    assert parse(parser, "add rice") == {"operation": "unknown"}
+    assert parser.stats()["failures"] == 1
+
+
+def test_timeout_is_unknown():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    parser = stub_parser(handler)
+    assert parse(parser, "add rice") == {"operation": "unknown"}
+    assert parser.stats() == {"requests": 1, "failures": 1, "in_flight": 0, "max_concurrency": 256}
+
+
+def test_cancellation_aborts_the_upstream_call():
+    started, aborted = asyncio.Event(), []
+
+    async def handler(request):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            aborted.append(request)
+            raise
+        return completion({"commands": []})
+
+    async def run():
+        parser = stub_parser(handler)
+        task = asyncio.ensure_future(parser.parse_command("add rice"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await parser.aclose()
+        return parser
+
+    parser = asyncio.run(run())
+    assert len(aborted) == 1
+    assert parser.stats()["in_flight"] == 0 and parser.stats()["failures"] == 0
@@ -0,0 +1,31 @@
+from change_log import ChangeLog
+
+
+def test_since_returns_changes_after_a_version():
+    log = ChangeLog(capacity=3, first_version=100)
+    assert [log.record("items", "create", {"id": i}) for i in range(2)] == [100, 101]
+    assert [change["version"] for change in log.since(99)] == [100, 101]
+    assert [change["version"] for change in log.since(100)] == [101]
+    assert log.since(101) == []
+
+
+def test_evicted_changes_need_a_resync():
+    log = ChangeLog(capacity=2, first_version=100)
+    for i in range(3):
+        log.record("items", "create", {"id": i})
+    assert log.since(99) is None
+    assert [change["version"] for change in log.since(100)] == [101, 102]
+
+
+def test_a_version_from_an_earlier_run_needs_a_resync():
+    before = ChangeLog(first_version=1_000)
+    for i in range(5):
+        before.record("items", "create", {"id": i})
+    # A restart with a clock that went backwards: the client is ahead of the log
+    after = ChangeLog(first_version=500)
+    after.record("items", "create", {"id": 0})
+    assert after.since(before.version) is None
+    # The usual restart: the client is behind the new log's first change
+    after = ChangeLog(first_version=2_000)
+    after.record("items", "create", {"id": 0})
+    assert after.since(before.version) is None
@@ -0,0 +1,39 @@
+import pytest
+
+import inventory
+from agent import ExecutionAgent
+
+
+@pytest.mark.parametrize("unit", [None, "", "unknown"])
+def test_unitless_new_item_is_counted_in_pieces(unit):
+    name = f"maggi {unit!r}"
+    assert inventory.add_item(name, 5, unit)["success"]
+    assert inventory.get_item(name)["unit"] == "pc"
+    assert inventory.add_item(name, 1, "dozen")["success"]
+    assert inventory.add_item(name, 3, None)["success"]
+    assert inventory.get_item(name)["quantity"] == 20
+    assert not inventory.add_item(name, 1, "kg")["success"]
+
+
+def test_rule_parsed_unitless_add_combines_with_real_units():
+    agent = ExecutionAgent()
+    for command in ("add 10 maggi noodles", "add 2 pcs of maggi noodles"):
+        agent.process_command(command)
+        assert agent.process_command("yes")["success"]
+    assert inventory.get_item("maggi noodles")["quantity"] == 12
+
+
+def test_stock_report_value_matches_the_running_total_past_int64():
+    name = "saffron bulk"
+    inventory.add_item(name, 1_000_000, "kg")
+    sku = inventory.catalog.resolve(name)
+    with inventory._lock_for(sku):
+        # Prices only come from storage; set one whose price * quantity overflows int64
+        before = inventory._stock_state(sku)
+        inventory._prices[sku] = 10 ** 8
+        inventory._track_stock(sku, before, inventory._stock_state(sku), alert=False)
+    try:
+        assert inventory._prices[sku] * inventory._quantities[sku] >= 1 << 63
+        assert inventory.stock_report()["total_value"] == inventory.dashboard_summary()["total_value"]
+    finally:
+        inventory.delete_item(name)
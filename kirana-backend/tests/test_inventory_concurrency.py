@@ -0,0 +1,119 @@
+import sys
+import threading
+
+import pytest
+
+import inventory
+
+THREADS = 8
+ADDS_PER_THREAD = 500
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """Switches threads far more often than usual so races show up quickly."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_concurrently(work):
+    """Runs work(thread_index) on THREADS threads released at the same moment."""
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            work(index)
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_adds_to_shared_items_lose_no_updates():
+    names = [f"stress shared {i}" for i in range(4)]
+
+    def work(index):
+        for n in range(ADDS_PER_THREAD):
+            # Every thread hits every item, in a different order per thread
+            name = names[(index + n) % len(names)]
+            assert inventory.add_item(name, 1, "pc")["success"]
+
+    run_concurrently(work)
+
+    total = THREADS * ADDS_PER_THREAD
+    quantities = [inventory.get_item(name)["quantity"] for name in names]
+    assert sum(quantities) == total
+    assert quantities == [total / len(names)] * len(names)
+
+
+def test_concurrent_first_adds_create_one_item():
+    name = "stress new item"
+    before = inventory.dashboard_summary()["sku_count"]
+
+    run_concurrently(lambda index: inventory.add_item(name, 0.5, "kg"))
+
+    item = inventory.get_item(name)
+    assert item["quantity"] == THREADS * 0.5
+    assert inventory.dashboard_summary()["sku_count"] == before + 1
+
+
+def test_concurrent_mixed_units_convert_exactly():
+    name = "stress sugar"
+    inventory.add_item(name, 0, "kg")
+
+    def work(index):
+        for _ in range(100):
+            # 250 g four times is one kg
+            assert inventory.add_item(name, 250, "g")["success"]
+
+    run_concurrently(work)
+
+    assert inventory.get_item(name)["quantity"] == THREADS * 100 * 0.25
+
+
+
+def test_a_mutation_racing_the_first_add_waits_for_it(monkeypatch):
+    name = "stress race item"
+    looked_up, adding, deleted = threading.Event(), threading.Event(), threading.Event()
+    overlapped = []
+    lock_for, persist = inventory._lock_for, inventory._persist
+
+    def slow_lock_for(sku):
+        # The delete looked the name up before it had an id; stall it until
+        # the add is in the middle of creating the item
+        if threading.current_thread().name == "delete":
+            looked_up.set()
+            adding.wait(5)
+        return lock_for(sku)
+
+    def watched_persist(sku, op):
+        adding.set()
+        overlapped.append(deleted.wait(0.2))
+        persist(sku, op)
+
+    monkeypatch.setattr(inventory, "_lock_for", slow_lock_for)
+    monkeypatch.setattr(inventory, "_persist", watched_persist)
+    results = {}
+
+    def delete():
+        results["delete"] = inventory.delete_item(name)
+        deleted.set()
+
+    deleter = threading.Thread(target=delete, name="delete")
+    deleter.start()
+    looked_up.wait(5)
+    results["add"] = inventory.add_item(name, 3, "pc")
+    deleter.join()
+
+    assert overlapped == [False]
+    assert results["add"]["success"] and results["delete"]["success"]
+    assert inventory.get_item(name) is None
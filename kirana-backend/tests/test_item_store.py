@@ -0,0 +1,52 @@
+import pytest
+
+from item_store import ItemStore
+
+
+def store_of(count: int) -> ItemStore:
+    store = ItemStore({"id": i, "quantity": i % 7} for i in range(1, count + 1))
+    store.SCAN_CHUNK = 8
+    return store
+
+
+def all_pages(store: ItemStore, limit: int, predicate=None) -> list:
+    pages, cursor = [], None
+    while True:
+        records, cursor = store.page(cursor, limit, predicate)
+        pages.append([record["id"] for record in records])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 3, 8, 50])
+@pytest.mark.parametrize("wanted", [None, {0}, {0, 3}, {9}])
+def test_pages_cover_the_matching_items_in_order(limit, wanted):
+    store = store_of(30)
+    predicate = None if wanted is None else (lambda record: record["quantity"] in wanted)
+    matching = [i for i in range(1, 31) if wanted is None or i % 7 in wanted]
+
+    pages = all_pages(store, limit, predicate)
+
+    assert [item_id for page in pages for item_id in page] == matching
+    assert all(len(page) == limit for page in pages[:-1])
+    assert len(pages[-1]) <= limit
+
+
+def test_filtering_runs_outside_the_lock():
+    store = store_of(30)
+    seen = []
+
+    def predicate(record):
+        assert not store._lock.locked()
+        # Writers get in between chunks; the scan resumes after the last id it saw
+        if record["id"] == 4:
+            store.delete(12)
+            store.create({"id": 31, "quantity": 0})
+        seen.append(record["id"])
+        return record["quantity"] == 0
+
+    records, cursor = store.page(None, 10, predicate)
+
+    assert [record["id"] for record in records] == [7, 14, 21, 28, 31]
+    assert cursor is None
+    assert 12 not in seen and seen == sorted(seen)
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ITEMS = int(os.getenv("KIRANA_BENCH_ITEMS", "1000000"))
+
+# Runs in a fresh interpreter so nothing else the tests allocated is counted.
+# Tracing starts after the imports and after the names are built, so the
+# result is the memory per item beyond its name string.
+BENCHMARK = """
+import sys
+import tracemalloc
+from datetime import datetime
+
+import inventory
+
+layout, count = sys.argv[1], int(sys.argv[2])
+names = [f"item {i}" for i in range(count)]
+tracemalloc.start()
+if layout == "legacy":
+    # The dicts of dicts inventory.py kept before items became typed arrays
+    inventory_items, stock = {}, {}
+    for i, name in enumerate(names):
+        inventory_items[name] = {
+            "name": name, "unit": "kg", "price": 0.0,
+            "created_at": datetime.now(), "updated_at": datetime.now(),
+        }
+        stock[name] = {
+            "item_id": name, "quantity": i % 50,
+            "created_at": datetime.now(), "updated_at": datetime.now(),
+        }
+else:
+    for i, name in enumerate(names):
+        inventory.add_item(name, i % 50, "kg")
+print(tracemalloc.get_traced_memory()[0])
+"""
+
+
+def traced_bytes(layout: str) -> int:
+    """Returns the bytes allocated to hold ITEMS items in the given layout."""
+    result = subprocess.run(
+        [sys.executable, "-c", BENCHMARK, layout, str(ITEMS)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "KIRANA_STORAGE": "memory"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int(result.stdout.split()[-1])
+
+
+@pytest.mark.skipif(
+    not os.getenv("KIRANA_BENCHMARK"),
+    reason="takes minutes; set KIRANA_BENCHMARK=1 to run",
+)
+def test_compact_items_use_a_fifth_of_the_memory():
+    legacy = traced_bytes("legacy") / ITEMS
+    compact = traced_bytes("compact") / ITEMS
+    print(f"\n{ITEMS} items: {legacy:.0f} bytes/item as dicts, {compact:.0f} bytes/item as arrays")
+    assert legacy >= 5 * compact
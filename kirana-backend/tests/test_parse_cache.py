@@ -0,0 +1,27 @@
+import pytest
+
+from parse_cache import normalize_command
+
+
+@pytest.mark.parametrize("command, normalized", [
+    ("Add five kg  Rice!", "add 5 kg rice"),
+    ("five hundred grams", "500 grams"),
+    ("add 2.5 kg rice.", "add 2.5 kg rice"),
+    ("add rice, dal", "add rice , dal"),
+    ("add rice; dal", "add rice , dal"),
+    ("add rice & dal", "add rice and dal"),
+    ("add rice+dal", "add rice and dal"),
+    ("add 1/2 kg ghee", "add 1/2 kg ghee"),
+])
+def test_normalize_command(command, normalized):
+    assert normalize_command(command) == normalized
+
+
+@pytest.mark.parametrize("first, second", [
+    ("add rice & dal", "add rice dal"),
+    ("add rice + dal", "add rice dal"),
+    ("add 1/2 kg ghee", "add 1 2 kg ghee"),
+    ("add 5% milk", "add 5 milk"),
+])
+def test_meaningful_characters_keep_commands_apart(first, second):
+    assert normalize_command(first) != normalize_command(second)
@@ -0,0 +1,71 @@
+import pytest
+
+from rule_parser import RuleBasedParser
+
+
+def add(item, quantity, unit=None, operation="add"):
+    command = {"operation": operation, "item": item, "quantity": quantity}
+    if unit is not None:
+        command["unit type"] = unit
+    return command
+
+
+def update(item, quantity, unit=None):
+    return add(item, quantity, unit, operation="update")
+
+
+@pytest.mark.parametrize("command, parsed", [
+    # The request's own examples
+    ("Add 5 kg of rice", add("rice", 5, "kg")),
+    ("Delete milk", {"operation": "delete", "item": "milk"}),
+    # Word order, articles and where the item goes
+    ("add rice 5 kg", add("rice", 5, "kg")),
+    ("add 5 kg rice to the inventory", add("rice", 5, "kg")),
+    ("received 2 litres of the milk", add("milk", 2, "litre")),
+    ("add 10 maggi", add("maggi", 10)),
+    ("add 3 bags of rice", add("rice", 3, "bags")),
+    ("add cream of wheat 2 kg", add("cream of wheat", 2, "kg")),
+    ("update rice to 5 kg", update("rice", 5, "kg")),
+    ("set the quantity of rice to 7", update("rice", 7)),
+    ("update the stock of rice to 5", update("rice", 5)),
+    ("remove the old bread", {"operation": "delete", "item": "old bread"}),
+    ("show inventory", {"operation": "list"}),
+    ("show me all the low stock items", {"operation": "list", "low_stock": True}),
+    # Number words
+    ("add five kg of sugar", add("sugar", 5, "kg")),
+    ("add twenty five pieces of soap", add("soap", 25, "pc")),
+    ("add two thousand three hundred fifty grams of salt", add("salt", 2350, "g")),
+    ("add half a kg of ghee", add("ghee", 0.5, "kg")),
+    ("add a dozen eggs", add("eggs", 1, "dozen")),
+    ("update rice to fifteen hundred grams", update("rice", 1500, "g")),
+    # Several commands
+    ("add 2 kg rice and 3 kg dal", [add("rice", 2, "kg"), add("dal", 3, "kg")]),
+    ("add rice 5 kg, dal 2 kg then delete salt", [
+        add("rice", 5, "kg"), add("dal", 2, "kg"), {"operation": "delete", "item": "salt"},
+    ]),
+    ("add 1 kg tea & update milk to 4 litres", [add("tea", 1, "kg"), update("milk", 4, "litre")]),
+    ("delete jam plus pickle", [{"operation": "delete", "item": "jam"}, {"operation": "delete", "item": "pickle"}]),
+])
+def test_parses(command, parsed):
+    assert RuleBasedParser().parse(command) == parsed
+
+
+@pytest.mark.parametrize("command", [
+    "",
+    "hello",
+    "add rice",                         # No quantity
+    "add 1.5 oil",                      # Fractional count without a unit
+    "add 3 bag rice",                   # Unregistered unit read as the item
+    "add 2 jar pickle",
+    "put 5 kg rice in the fridge",      # A place that is not the inventory
+    "add 5 kg rice for diwali",
+    "remove 2 kg rice",                 # Removing stock, not the item
+    "set price of rice to 50",          # A field other than the quantity
+    "add 5 kg rice and hello",          # One clause the grammar cannot read
+    "add five hundred",                 # The quantity swallowed the item
+    "add 2 kg 3 rice",
+])
+def test_defers_to_the_llm(command):
+    parser = RuleBasedParser()
+    assert parser.parse(command) is None
+    assert parser.stats() == {"matched": 0, "deferred": 1}
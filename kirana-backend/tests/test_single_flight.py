@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+FOLLOWERS = 4
+
+
+def wait_until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("timed out")
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+    results = {}
+
+    def call():
+        entered.set()
+        release.wait(5)
+        return {"items": ["rice"]}
+
+    def run(index):
+        results[index] = flights.do("add rice", call)
+
+    threads = [threading.Thread(target=run, args=(0,))]
+    threads[0].start()
+    entered.wait(5)
+    threads += [threading.Thread(target=run, args=(i,)) for i in range(1, FOLLOWERS + 1)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flights.coalesced == FOLLOWERS)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(result == {"items": ["rice"]} for result in results.values())
+    # Followers get copies they may modify without touching the leader's
+    assert len({id(result) for result in results.values()}) == FOLLOWERS + 1
+    assert flights.stats() == {"calls": 1, "coalesced": FOLLOWERS, "in_flight": 0}
+
+
+def test_followers_get_the_leaders_exception():
+    flights = SingleFlight()
+    entered, release = threading.Event(), threading.Event()
+    errors = []
+
+    def call():
+        entered.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    def run():
+        try:
+            flights.do("key", call)
+        except ValueError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    entered.wait(5)
+    follower = threading.Thread(target=run)
+    follower.start()
+    wait_until(lambda: flights.coalesced == 1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert [str(exc) for exc in errors] == ["upstream down"] * 2
+    # The failed call is not remembered
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.stats() == {"calls": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_cancelled_follower_leaves_the_call_running():
+    flights = SingleFlight()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return ["rice"]
+
+        leader = asyncio.ensure_future(flights.do_async("key", call))
+        follower = asyncio.ensure_future(flights.do_async("key", call))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert flights.stats()["in_flight"] == 1
+        release.set()
+        return await leader
+
+    assert asyncio.run(run()) == ["rice"]
+    assert flights.stats() == {"calls": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_last_waiter_cancelling_cancels_the_call():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def run():
+        async def call():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        waiters = [asyncio.ensure_future(flights.do_async("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        await asyncio.sleep(0)
+        assert cancelled == [True]
+        # The cancelled call is forgotten at once, so the next caller starts a new one
+        assert flights.stats()["in_flight"] == 0
+
+        async def fresh():
+            return "fresh"
+
+        return await flights.do_async("key", fresh)
+
+    assert asyncio.run(run()) == "fresh"
+    assert flights.stats() == {"calls": 2, "coalesced": 2, "in_flight": 0}
+
+
+def test_forget_only_drops_the_flight_it_was_given():
+    flights = SingleFlight()
+    current = flights._tasks["key"] = [None, 1]
+    flights._forget("key", [None, 1])
+    assert flights._tasks["key"] is current
+    flights._forget("key", current)
+    assert "key" not in flights._tasks
+    flights._forget("key", current)  # Already gone
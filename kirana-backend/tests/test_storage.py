@@ -0,0 +1,198 @@
+import marshal
+import os
+import subprocess
+import sys
+import zlib
+
+import pytest
+
+from storage import FIELDS, SQLiteStorage, WALStorage
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMPTY = [[] for _ in FIELDS]
+
+
+def record(name: str, version: int, quantity: float = 1.0, sku: int = 1) -> dict:
+    return {
+        "name": name, "unit": "kg", "price": 2.5, "quantity": quantity,
+        "created_at": 100.0, "updated_at": 200.0, "version": version, "sku": sku, "threshold": 5.0,
+    }
+
+
+def rows(columns) -> dict:
+    """Loaded columns as name -> record."""
+    return {values[0]: dict(zip(FIELDS, values)) for values in zip(*columns)}
+
+
+def open_sqlite(path):
+    return SQLiteStorage(str(path / "kirana.db"), flush_interval=60)
+
+
+def open_wal(path):
+    return WALStorage(str(path / "wal"), group_commit_interval=60, snapshot_interval=1e9)
+
+
+def load_wal(path):
+    storage = open_wal(path)
+    try:
+        return storage.load()
+    finally:
+        storage.close()
+
+
+@pytest.fixture(params=[open_sqlite, open_wal], ids=["sqlite", "wal"])
+def reopen(request, tmp_path):
+    """Opens the backend on the same files every call, closing the last one."""
+    opened = []
+
+    def open_backend():
+        if opened:
+            opened[-1].close()
+        opened.append(request.param(tmp_path))
+        return opened[-1]
+
+    yield open_backend
+    opened[-1].close()
+
+
+def test_reopen_replays_puts_and_deletes(reopen):
+    storage = reopen()
+    storage.put(record("rice", 1, sku=1))
+    storage.put(record("dal", 2, sku=2))
+    storage.put(record("rice", 3, quantity=7.5, sku=1))
+    storage.delete("dal", 4, 2)
+
+    columns, marks = reopen().load()
+    assert rows(columns) == {"rice": record("rice", 3, quantity=7.5, sku=1)}
+    assert marks == {"deleted_version": 4, "deleted_sku": 2}
+
+
+def test_marks_are_the_highest_ever_deleted(reopen):
+    storage = reopen()
+    assert storage.load() == (EMPTY, {"deleted_version": 0, "deleted_sku": 0})
+    storage.put(record("rice", 1, sku=7))
+    storage.delete("rice", 5, 7)
+    storage.flush()
+    # Lower marks later, and a delete of a name that was never stored
+    storage.delete("dal", 3, 2)
+
+    storage = reopen()
+    assert storage.load()[1] == {"deleted_version": 5, "deleted_sku": 7}
+    storage.delete("salt", 9, 1)
+    assert reopen().load() == (EMPTY, {"deleted_version": 9, "deleted_sku": 7})
+
+
+RESTART = """
+import sys
+import inventory
+for name in sys.argv[1:]:
+    if name.startswith("-"):
+        inventory.delete_item(name[1:])
+    else:
+        inventory.add_item(name, 1, "kg")
+print(inventory.catalog.resolve(sys.argv[-1]))
+"""
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "wal"])
+def test_deleted_sku_ids_are_not_reused_after_a_restart(kind, tmp_path):
+    env = {**os.environ, "KIRANA_STORAGE": kind, "KIRANA_DB_PATH": str(tmp_path / "kirana.db"), "KIRANA_WAL_DIR": str(tmp_path / "wal")}
+
+    def run(*names):
+        result = subprocess.run(
+            [sys.executable, "-c", RESTART, *names], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return int(result.stdout.split()[-1])
+
+    assert run("apple", "banana") == 2
+    assert run("-banana", "apple") == 1
+    assert run("cherry") == 3
+
+
+def segment_paths(directory) -> list:
+    return sorted(str(directory / name) for name in os.listdir(directory) if name.endswith(".log"))
+
+
+def test_wal_truncated_tail_ends_replay(tmp_path):
+    storage = open_wal(tmp_path)
+    for version in range(1, 4):
+        storage.put(record(f"item {version}", version, sku=version))
+    storage.close()
+    (segment,) = [path for path in segment_paths(tmp_path / "wal") if os.path.getsize(path)]
+    with open(segment, "r+b") as f:
+        f.truncate(os.path.getsize(segment) - 3)
+
+    assert sorted(rows(load_wal(tmp_path)[0])) == ["item 1", "item 2"]
+    storage = open_wal(tmp_path)
+    # Writes after the torn record go to a new segment and survive
+    storage.put(record("item 4", 4, sku=4))
+    storage.close()
+    assert sorted(rows(load_wal(tmp_path)[0])) == ["item 1", "item 2", "item 4"]
+
+
+def test_wal_corrupt_record_ends_replay(tmp_path):
+    storage = open_wal(tmp_path)
+    for version in range(1, 4):
+        storage.put(record(f"item {version}", version, sku=version))
+    storage.close()
+    (segment,) = [path for path in segment_paths(tmp_path / "wal") if os.path.getsize(path)]
+    with open(segment, "r+b") as f:
+        data = bytearray(f.read())
+        data[len(data) // 2] ^= 0xFF  # Inside the second record
+        f.seek(0)
+        f.write(data)
+
+    assert sorted(rows(load_wal(tmp_path)[0])) == ["item 1"]
+
+
+def test_wal_snapshot_plus_tail(tmp_path):
+    storage = open_wal(tmp_path)
+    storage.put(record("rice", 1, sku=1))
+    storage.put(record("dal", 2, sku=2))
+    storage.delete("salt", 3, 9)
+    storage.snapshot()
+    # Only the segment opened by the snapshot is left
+    assert len(segment_paths(tmp_path / "wal")) == 1
+    storage.put(record("rice", 4, quantity=9.0, sku=1))
+    storage.delete("dal", 5, 2)
+    storage.put(record("sugar", 6, sku=3))
+    storage.close()
+
+    columns, marks = load_wal(tmp_path)
+    assert rows(columns) == {"rice": record("rice", 4, quantity=9.0, sku=1), "sugar": record("sugar", 6, sku=3)}
+    assert marks == {"deleted_version": 5, "deleted_sku": 9}
+
+
+def test_wal_snapshot_keeps_marks(tmp_path):
+    storage = open_wal(tmp_path)
+    storage.put(record("rice", 1, sku=4))
+    storage.delete("rice", 2, 4)
+    storage.snapshot()
+    storage.close()
+    for path in segment_paths(tmp_path / "wal"):
+        assert os.path.getsize(path) == 0
+    assert load_wal(tmp_path) == (EMPTY, {"deleted_version": 2, "deleted_sku": 4})
+
+
+def test_wal_reads_snapshots_holding_just_the_deleted_version(tmp_path):
+    os.makedirs(tmp_path / "wal")
+    with open(tmp_path / "wal" / WALStorage._SNAPSHOT_FILE, "wb") as f:
+        f.write(WALStorage._SNAPSHOT_MAGIC)
+        marshal.dump((1, EMPTY, 6), f)
+    assert load_wal(tmp_path) == (EMPTY, {"deleted_version": 6, "deleted_sku": 0})
+
+
+@pytest.mark.parametrize("payload, marks", [
+    ("rice", {"deleted_version": 0, "deleted_sku": 0}),  # Logged before deletes carried a version
+    (("rice", 3), {"deleted_version": 3, "deleted_sku": 0}),  # Before they carried a SKU id
+])
+def test_wal_replays_old_deletes(tmp_path, payload, marks):
+    storage = open_wal(tmp_path)
+    storage.put(record("rice", 1))
+    storage.close()
+    payload = marshal.dumps(payload)
+    frame = WALStorage._HEADER.pack(len(payload), zlib.crc32(payload), WALStorage._OP_DELETE) + payload
+    with open(os.path.join(tmp_path, "wal", "wal-999999999999.log"), "wb") as f:
+        f.write(frame)
+
+    assert load_wal(tmp_path) == (EMPTY, marks)
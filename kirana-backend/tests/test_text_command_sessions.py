@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+def send(command: str, session_id: str) -> dict:
+    response = client.post("/text-command", json={"command": command, "session_id": session_id})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_confirmation_only_answers_its_own_session():
+    assert send("add 2 kg session rice", "a")["response"].startswith("Confirm:")
+    assert send("yes", "b") == {"success": False, "response": "No pending command to confirm."}
+    assert send("add 3 kg session dal", "b")["response"].startswith("Confirm:")
+
+    confirmed = send("yes", "a")
+    assert confirmed["success"] and confirmed["item"]["name"] == "session rice"
+    confirmed = send("yes", "b")
+    assert confirmed["success"] and confirmed["item"]["name"] == "session dal"
+
+
+def test_dropped_session_releases_its_pending_confirmation():
+    sessions = main.agent_sessions
+    max_sessions, sessions.max_sessions = sessions.max_sessions, 1
+    try:
+        pending = client.get("/dashboard/summary").json()["pending_confirmations"]
+        send("add 1 kg session salt", "first")
+        assert client.get("/dashboard/summary").json()["pending_confirmations"] == pending + 1
+        send("list inventory", "second")
+        assert client.get("/dashboard/summary").json()["pending_confirmations"] == pending
+        assert send("yes", "first") == {"success": False, "response": "No pending command to confirm."}
+    finally:
+        sessions.max_sessions = max_sessions
@@ -0,0 +1,153 @@
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Bulk conversion falls back to a list comprehension
+    np = None
+
+
+# Stored quantities are whole thousandths of a base unit (milligrams,
+# microlitres, thousandths of a piece), so arithmetic on them is exact.
+QUANTITY_SCALE = 1000
+
+
+class Unit(NamedTuple):
+    """A unit of measurement and its size in its dimension's base unit."""
+
+    name: str       # Canonical spelling, used for display
+    dimension: str  # "mass", "volume", "count", or the unit's own name
+    factor: int     # Base units in one of this unit
+
+    def to_milli(self, quantity: float) -> int:
+        """Converts a quantity in this unit to thousandths of a base unit."""
+        return round(quantity * self.factor * QUANTITY_SCALE)
+
+    def from_milli(self, milli: int) -> float:
+        """Converts thousandths of a base unit to a quantity in this unit."""
+        return milli / (self.factor * QUANTITY_SCALE)
+
+
+# Base unit of each built-in dimension
+BASE_UNITS = {"mass": "g", "volume": "ml", "count": "pc"}
+
+# Every known spelling -> unit. Conversions look units up here instead of
+# parsing them, so resolving a unit is a dict hit.
+_units: Dict[str, Unit] = {}
+_lock = threading.Lock()
+
+
+def register(name: str, dimension: str, factor: int, aliases: Sequence[str] = ()) -> Unit:
+    """
+    Adds a unit to the registry.
+
+    Args:
+        name (str): The canonical spelling.
+        dimension (str): What the unit measures.
+        factor (int): Base units in one of this unit.
+        aliases (Sequence[str]): Other spellings that mean the same unit.
+
+    Returns:
+        Unit: The registered unit.
+    """
+    unit = Unit(name, dimension, factor)
+    with _lock:
+        for spelling in (name, *aliases):
+            _units[spelling] = unit
+            _units[spelling.lower()] = unit
+    return unit
+
+
+register("g", "mass", 1, ["gm", "gms", "gram", "grams", "gramme", "grammes"])
+register("kg", "mass", 1000, ["kgs", "kilo", "kilos", "kilogram", "kilograms"])
+register("quintal", "mass", 100_000, ["quintals"])
+register("tonne", "mass", 1_000_000, ["tonnes", "ton", "tons"])
+register("ml", "volume", 1, ["millilitre", "millilitres", "milliliter", "milliliters"])
+register("litre", "volume", 1000, ["l", "ltr", "ltrs", "litres", "liter", "liters"])
+register("pc", "count", 1, ["pcs", "piece", "pieces", "unit", "units", "item", "items"])
+register("dozen", "count", 12, ["dozens"])
+for _size in (2, 4, 6, 10, 12, 20, 24, 30, 48, 50, 100):
+    register(f"case of {_size}", "count", _size,
+             [f"{container} of {_size}" for container in ("pack", "box", "carton", "crate", "tray")])
+
+
+def find(unit: str) -> Optional[Unit]:
+    """
+    Looks up a unit by any of its spellings.
+
+    Args:
+        unit (str): The unit as written, e.g. "Kg" or "case of 12".
+
+    Returns:
+        Optional[Unit]: The unit, or None if it is not registered.
+    """
+    found = _units.get(unit)
+    if found is None:
+        found = _units.get(unit.strip().lower())
+    return found
+
+
+def lookup(unit: str) -> Unit:
+    """
+    Looks up a unit, registering an unknown one as its own dimension.
+
+    Unknown units (e.g. "bag") can only be combined with themselves.
+
+    Args:
+        unit (str): The unit as written.
+
+    Returns:
+        Unit: The unit.
+    """
+    found = find(unit)
+    if found is None:
+        name = unit.strip().lower()
+        found = register(name, name, 1)
+    return found
+
+
+def base_unit(dimension: str) -> str:
+    """Returns the name of the unit a dimension's quantities are stored in."""
+    return BASE_UNITS.get(dimension, dimension)
+
+
+def convert(quantity: float, from_unit: str, to_unit: str) -> float:
+    """
+    Converts a quantity between two units of the same dimension.
+
+    Args:
+        quantity (float): The quantity in from_unit.
+        from_unit (str): The unit it is given in.
+        to_unit (str): The unit wanted.
+
+    Returns:
+        float: The quantity in to_unit.
+
+    Raises:
+        ValueError: If the units measure different things.
+    """
+    source, target = lookup(from_unit), lookup(to_unit)
+    if source.dimension != target.dimension:
+        raise ValueError(f"Cannot convert {source.name} to {target.name}")
+    return quantity * source.factor / target.factor
+
+
+def convert_many(quantities: Any, from_unit: str, to_unit: str) -> Any:
+    """
+    Converts a column of quantities between two units of the same dimension.
+
+    Args:
+        quantities (Any): A NumPy array, or any sequence of numbers.
+        from_unit (str): The unit they are given in.
+        to_unit (str): The unit wanted.
+
+    Returns:
+        Any: A NumPy float array when NumPy is available, else a list.
+
+    Raises:
+        ValueError: If the units measure different things.
+    """
+    scale = convert(1, from_unit, to_unit)
+    if np is not None:
+        return np.asarray(quantities, dtype=np.float64) * scale
+    return [quantity * scale for quantity in quantities]
@@ -12,6 +12,8 @@ const Chatbot = () => {
   const [recording, setRecording] = useState(false);
   const [isProcessing, setIsProcessing] = useState(false);
   const chatRef = useRef<HTMLDivElement>(null);
+  // Identifies this chat to the backend, so "yes"/"no" confirm only our own commands
+  const sessionId = useRef(crypto.randomUUID());
 
   const { addToCart } = useCart(); // Use the hook to get addToCart
 
@@ -33,7 +35,7 @@ const Chatbot = () => {
       const response = await fetch("http://localhost:8000/text-command", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ command: input }),
+        body: JSON.stringify({ command: input, session_id: sessionId.current }),
       });
 
       const data = await response.json();
@@ -96,7 +98,7 @@ const Chatbot = () => {
             const commandResponse = await fetch("http://localhost:8000/text-command", {
               method: "POST",
               headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({ command: data.transcription }),
+              body: JSON.stringify({ command: data.transcription, session_id: sessionId.current }),
             });
             const commandData = await commandResponse.json();
 
@@ -1,12 +1,28 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import DashboardCard from "./DashboardCard";
 
+interface DashboardSummary {
+  sku_count: number;
+  total_value: number;
+  low_stock: number;
+  pending_confirmations: number;
+}
+
 const DashboardGrid: React.FC = () => {
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
+
+  useEffect(() => {
+    fetch("http://localhost:8000/dashboard/summary")
+      .then((res) => res.json())
+      .then(setSummary)
+      .catch((error) => console.error("Error fetching dashboard summary:", error));
+  }, []);
+
   return (
     <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mt-6">
       <DashboardCard
         title="Low Inventory"
-        value="12 Items"
+        value={summary ? `${summary.low_stock} Items` : "-"}
         description="Items below the threshold."
         bgColor="bg-red-100"
       />